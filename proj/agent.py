@@ -1,5 +1,7 @@
-import random
+from bisect import bisect_right
+from functools import lru_cache
 
+import numpy as np
 from mesa import Agent
 from enum import Enum
 
@@ -20,32 +22,89 @@ def leave_probability(time_parked, min, med, max):
         return 1.0
 
 
-class Car(Agent):
-    def __init__(self, unique_id, model, car_type, created_minute):
-        super().__init__(unique_id, model)
+def leave_probabilities(time_parked, min, med, max):
+    # Vectorized leave_probability over an array of parking times
+    return np.interp(time_parked, [min, med, max], [0.0, 0.5, 1.0])
+
+
+@lru_cache(maxsize=None)
+def departure_cdf(min, med, max):
+    # cdf[t] = probability that a car has left after t minutes parked, when every minute
+    # it leaves with probability leave_probability(t)
+    cdf = []
+    staying = 1.0
+    for time_parked in range(max + 1):
+        staying *= 1 - leave_probability(time_parked, min, med, max)
+        cdf.append(1 - staying)
+    return cdf
+
+
+def departure_delay(u, min, med, max):
+    # Invert the departure cdf: minutes parked before leaving for a uniform draw u in [0, 1)
+    return bisect_right(departure_cdf(min, med, max), u)
+
+
+def departure_delay_after(u, elapsed, min, med, max):
+    # departure_delay for a car known to have stayed `elapsed` minutes already
+    cdf = departure_cdf(min, med, max)
+    if elapsed > 0:
+        if elapsed > len(cdf):
+            return elapsed
+        u = cdf[elapsed - 1] + u * (1 - cdf[elapsed - 1])
+    delay = bisect_right(cdf, u)
+    return delay if delay > elapsed else elapsed
+
+
+class CarRecord:
+    """
+    Car state and behaviour without the Mesa Agent machinery. Headless runs use these records
+    directly, recycled through a CarPool; Car wraps them as an agent for the grid and the GUI.
+    """
+
+    __slots__ = ("unique_id", "model", "pos", "car_type", "parked", "created_minute", "parked_minute",
+                 "leaved_minute", "spot", "dwell")
+
+    def __init__(self, unique_id, model, car_type, created_minute, dwell=None):
+        self.pos = None
+        self.reset(unique_id, model, car_type, created_minute, dwell)
+
+    def reset(self, unique_id, model, car_type, created_minute, dwell=None):
+        self.unique_id = unique_id
+        self.model = model
         self.car_type = car_type
         self.parked = False
         self.created_minute = created_minute
-        self.parked_minute = 0
+        self.parked_minute = None
         self.leaved_minute = 0
-        self.waiting_time = 0  
-        
-    def park_car(self, parked_minute):
+        self.spot = None
+        # Minutes to stay parked when sampled up front, otherwise decided minute by minute
+        self.dwell = dwell
+
+    def park_car(self, parked_minute, spot=None):
         self.parked = True
         self.parked_minute = parked_minute
+        self.spot = spot
         
-    def increment_waiting_time(self):
-        self.waiting_time += 1
+    @property
+    def waiting_time(self):
+        # Minutes from arrival until parking, or until now while still queued
+        end = self.model.current_minutes if self.parked_minute is None else self.parked_minute
+        return end - self.created_minute
 
     def step(self):
         if self.parked:
             time_parked = self.model.current_minutes - self.parked_minute
-            # 2. Call it as an instance method, passing just time_parked
-            p = leave_probability(time_parked, 25, 50, 75)
-            if random.random() < p:
-                self.parked = False
-                self.leaved_minute = self.model.current_minutes
+            if self.dwell is not None:
+                leaving = time_parked >= self.dwell
+            else:
+                leaving = self.model.departure_random.random() < leave_probability(time_parked, 25, 50, 75)
+            if leaving:
+                self.leave(self.model.current_minutes)
                 self.model.leave_park(self)
+
+    def leave(self, leaved_minute):
+        self.parked = False
+        self.leaved_minute = leaved_minute
        
     def get_type(self):
         return self.car_type
@@ -53,10 +112,43 @@ class Car(Agent):
     def get_state(self):
         return self.parked
 
-# Define the spot agent
-class Spot(Agent):
-    def __init__(self, unique_id, model, spot_type = Type.NORMAL):
-        super().__init__(unique_id, model)
+
+class Car(CarRecord, Agent):
+    def __init__(self, unique_id, model, car_type, created_minute, dwell=None):
+        Agent.__init__(self, unique_id, model)
+        self.reset(unique_id, model, car_type, created_minute, dwell)
+
+
+class CarPool:
+    """Free list of departed CarRecords, reused for new arrivals instead of allocating."""
+
+    def __init__(self):
+        self.free = []
+
+    def acquire(self, unique_id, model, car_type, created_minute, dwell=None):
+        if self.free:
+            car = self.free.pop()
+            car.reset(unique_id, model, car_type, created_minute, dwell)
+            return car
+        return CarRecord(unique_id, model, car_type, created_minute, dwell)
+
+    def release(self, car):
+        car.model = None
+        self.free.append(car)
+
+
+class SpotRecord:
+    """Spot state without the Mesa Agent machinery, for headless runs; Spot is the agent version."""
+
+    __slots__ = ("unique_id", "model", "pos", "spot_type", "x", "y", "available", "current_car")
+
+    def __init__(self, unique_id, model, spot_type=Type.NORMAL):
+        self.unique_id = unique_id
+        self.model = model
+        self.pos = None
+        self.init_spot(spot_type)
+
+    def init_spot(self, spot_type):
         self.spot_type = spot_type
         self.x = 0
         self.y = 0
@@ -66,13 +158,17 @@ class Spot(Agent):
     def park_car(self, car):
         self.available = False
         self.current_car = car
+        self.model.mark_spot_taken(self)
 
     def unpark_car(self):
         self.available = True
         self.current_car = None
+        self.model.mark_spot_free(self)
 
     def set_type(self, spot_type):
+        previous_type = self.spot_type
         self.spot_type = spot_type
+        self.model.mark_spot_retyped(self, previous_type)
         
     def set_position(self, x, y):
         self.x = x
@@ -86,3 +182,10 @@ class Spot(Agent):
 
     def is_available(self):
         return self.available
+
+
+# Define the spot agent
+class Spot(SpotRecord, Agent):
+    def __init__(self, unique_id, model, spot_type = Type.NORMAL):
+        Agent.__init__(self, unique_id, model)
+        self.init_spot(spot_type)
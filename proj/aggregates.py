@@ -0,0 +1,84 @@
+import math
+
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram (as in DDSketch): quantiles are within `relative_accuracy` of the true
+    value, using at most `max_buckets` buckets however many values are added.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value, count=1):
+        self.count += count
+        if value <= 0:
+            self.zeros += count
+            return
+
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            # Fold the two lowest buckets together; only the smallest values lose accuracy
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+
+    def merge(self, other):
+        self.zeros += other.zeros
+        self.count += other.count
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def quantile(self, q):
+        if self.count == 0:
+            return 0.0
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class WaitTimeStats:
+    """Running count, sum and sum of squares of waiting times, plus a quantile sketch."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.total_squares = 0
+        self.sketch = QuantileSketch()
+
+    def add(self, waiting_time):
+        self.count += 1
+        self.total += waiting_time
+        self.total_squares += waiting_time * waiting_time
+        self.sketch.add(waiting_time)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_squares += other.total_squares
+        self.sketch.merge(other.sketch)
+
+    def mean(self):
+        return self.total / self.count if self.count > 0 else 0
+
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_squares - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
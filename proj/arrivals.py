@@ -0,0 +1,103 @@
+import numpy as np
+
+from agent import departure_cdf
+from vectorized import CAR_TYPES
+
+MINUTES_PER_DAY = 1440
+
+
+def peak_hour_curve(cars_added_per_step, peak_hour_start, peak_hour_end):
+    """
+    Arrivals per minute for each hour of the day: cars_added_per_step, rising linearly to 1.5 times
+    that in the middle of the peak hours and back down.
+    """
+    peak_mid = (peak_hour_start + peak_hour_end) / 2
+    rates = []
+    for hour in range(24):
+        if peak_hour_start <= hour < peak_hour_end:
+            if hour <= peak_mid:
+                multiplier = 1 + (hour - peak_hour_start) / (peak_mid - peak_hour_start) * 0.5
+            else:
+                multiplier = 1 + (peak_hour_end - hour) / (peak_hour_end - peak_mid) * 0.5
+        else:
+            multiplier = 1
+        rates.append(cars_added_per_step * multiplier)
+    return rates
+
+
+class ArrivalGenerator:
+    """
+    Arrival counts and car types for a chunk of minutes at a time, drawn in a few vectorized
+    operations from a per-minute rate table built once from 24 hourly rates.
+
+    Counts are the integer part of the rate, or Poisson distributed around it with poisson=True.
+    With a dwell_rng every arrival also gets its parking time up front. Chunks are always drawn in
+    order, so a given arrival gets the same type and parking time however the run is stepped.
+    """
+
+    def __init__(self, hourly_rates, probabilities, count_rng, type_rng, dwell_rng=None, poisson=False,
+                 chunk_minutes=MINUTES_PER_DAY):
+        hourly_rates = np.asarray(hourly_rates, dtype=float)
+        if hourly_rates.shape != (24,) or (hourly_rates < 0).any():
+            raise ValueError("Hourly demand needs 24 non-negative arrival rates")
+
+        self.minute_rates = np.repeat(hourly_rates, 60)
+        cumulative = np.cumsum(probabilities, dtype=float)
+        self.cumulative = cumulative / cumulative[-1]
+        self.count_rng = count_rng
+        self.type_rng = type_rng
+        self.dwell_rng = dwell_rng
+        self.poisson = poisson
+        self.chunk_minutes = chunk_minutes
+
+        # First minute of the current chunk, one past its last minute, where each minute's arrivals
+        # start in the types/dwells arrays, and the arrays themselves
+        self.start = 0
+        self.end = 0
+        self.offsets = None
+        self.types = None
+        self.dwells = None
+
+    def generate_next(self):
+        self.start = self.end
+        self.end = self.start + self.chunk_minutes
+        rates = self.minute_rates[np.arange(self.start, self.end) % MINUTES_PER_DAY]
+        counts = self.count_rng.poisson(rates) if self.poisson else rates.astype(np.int64)
+
+        self.offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        total = int(self.offsets[-1])
+
+        types = np.searchsorted(self.cumulative, self.type_rng.random(total), side="right")
+        self.types = np.minimum(types, len(CAR_TYPES) - 1)
+        if self.dwell_rng is not None:
+            self.dwells = np.searchsorted(departure_cdf(25, 50, 75), self.dwell_rng.random(total), side="right")
+
+    def span(self, minute):
+        if minute < self.start:
+            raise ValueError(f"Arrivals for minute {minute} were already discarded")
+        while minute >= self.end:
+            self.generate_next()
+        index = minute - self.start
+        return self.offsets[index], self.offsets[index + 1]
+
+    def count_at(self, minute):
+        first, last = self.span(minute)
+        return int(last - first)
+
+    def next_arrival(self, minute):
+        """
+        First minute from `minute` on with arrivals, looking only within the chunk already drawn:
+        with none left in it, the chunk's end (where the next chunk gets drawn) is returned.
+        """
+        if minute < self.start or minute >= self.end:
+            return minute
+        counts = np.diff(self.offsets[minute - self.start:])
+        busy = np.flatnonzero(counts)
+        return minute + int(busy[0]) if len(busy) else self.end
+
+    def at(self, minute):
+        """Type indexes (into CAR_TYPES) of the minute's arrivals, and their parking times or None."""
+        first, last = self.span(minute)
+        dwells = self.dwells[first:last] if self.dwells is not None else None
+        return self.types[first:last], dwells
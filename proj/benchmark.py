@@ -0,0 +1,185 @@
+"""
+Step-throughput benchmarks for the parking lot models.
+
+Every case runs twice, each time in a fresh process: once timed, reporting simulated minutes per
+second, and once under tracemalloc, reporting the peak memory the case itself allocated (the
+interpreter and imports are left out, so they do not hide changes). A case is either bare
+model.step() calls ("step") or Simulation.run_simulation end to end ("simulation", which adds the
+per-minute bookkeeping). Results are written as JSON and can be
+compared with a previous run; the script exits with status 1 when a case regressed.
+
+    python proj/benchmark.py --spots 100 1000 --output bench.json
+    python proj/benchmark.py --spots 100 1000 --baseline bench.json
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from auxiliar import calculate_dimensions
+from simulation import Simulation, Modes, Engines
+from model import Backends
+
+MODEL_MODES = {
+    "PriorityModel": Modes.PRIORITY,
+    "OnDemandModel": Modes.ON_DEMAND,
+    "TimeBasedModel": Modes.TIME_BASED,
+    "MembershipModel": Modes.MEMBERSHIP,
+}
+
+
+def case_key(case):
+    return "/".join(f"{key}={case[key]}" for key in sorted(case))
+
+
+def build_simulation(case):
+    electric_chance = 0.1
+    premium_chance = 0.1 if case["model"] == "MembershipModel" else 0
+    width, height = calculate_dimensions(case["total_spots"], 0, 0)
+    return Simulation(
+        width=width,
+        height=height + 1,
+        total_spots=case["total_spots"],
+        electric_percentage=electric_chance,
+        premium_percentage=premium_chance,
+        electric_chance=electric_chance,
+        premium_chance=premium_chance,
+        mode=MODEL_MODES[case["model"]],
+        max_queue_len=case["max_queue_size"],
+        cars_added_per_step=case["cars_added_per_step"],
+        engine=Engines(case["engine"]),
+        backend=Backends(case["backend"]),
+        seed=0,
+        headless=True,
+    )
+
+
+def run_target(simulation, case):
+    if case["target"] == "simulation":
+        simulation.run_simulation()
+    else:
+        for _ in range(case["horizon"]):
+            simulation.model.step()
+
+
+def run_case(case):
+    # Progress output from the simulation is not part of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation = build_simulation(case)
+        simulation.horizon = case["horizon"]
+
+        start = time.perf_counter()
+        run_target(simulation, case)
+        seconds = time.perf_counter() - start
+
+    return dict(case, seconds=seconds, steps_per_second=case["horizon"] / seconds)
+
+
+def measure_memory(case):
+    # Peak of everything allocated from building the model to the end of the run, in KiB. Tracing
+    # slows the run down, so it is kept out of the timed run
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        simulation = build_simulation(case)
+        simulation.horizon = case["horizon"]
+        run_target(simulation, case)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak // 1024
+
+
+def build_cases(args):
+    cases = []
+    for model, spots, cars, queue, horizon, target in itertools.product(
+            args.models, args.spots, args.cars, args.queue, args.horizon, args.targets):
+        cases.append({
+            "model": model,
+            "total_spots": spots,
+            "cars_added_per_step": cars,
+            "max_queue_size": queue,
+            "horizon": horizon,
+            "target": target,
+            "engine": args.engine,
+            "backend": args.backend,
+        })
+    return cases
+
+
+def compare(results, baseline, tolerance):
+    """Print every case against the baseline and return the keys of the ones that regressed."""
+    baseline_cases = {case_key(result_case(result)): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = case_key(result_case(result))
+        previous = baseline_cases.get(key)
+        if previous is None:
+            print(f"NEW   {key}: {result['steps_per_second']:.1f} steps/s")
+            continue
+
+        speed = result["steps_per_second"] / previous["steps_per_second"]
+        # Baselines from before peak_memory_kib was measured are compared on speed only
+        memory = result["peak_memory_kib"] / max(previous.get("peak_memory_kib", result["peak_memory_kib"]), 1)
+        slower = speed < 1 - tolerance
+        larger = memory > 1 + tolerance
+        status = "SLOWER" if slower else "LARGER" if larger else "OK"
+        print(f"{status:<6}{key}: {result['steps_per_second']:.1f} steps/s ({speed:.2f}x), "
+              f"{result['peak_memory_kib']} KiB ({memory:.2f}x)")
+        if slower or larger:
+            regressions.append(key)
+    return regressions
+
+
+def result_case(result):
+    return {key: value for key, value in result.items()
+            if key not in ("seconds", "steps_per_second", "peak_rss_kib", "peak_memory_kib")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=list(MODEL_MODES), choices=list(MODEL_MODES))
+    parser.add_argument("--spots", nargs="+", type=int, default=[100, 1000, 10000, 100000])
+    parser.add_argument("--cars", nargs="+", type=int, default=[4])
+    parser.add_argument("--queue", nargs="+", type=int, default=[20])
+    parser.add_argument("--horizon", nargs="+", type=int, default=[1440])
+    parser.add_argument("--targets", nargs="+", default=["step", "simulation"], choices=["step", "simulation"])
+    parser.add_argument("--engine", default=Engines.STEP.value, choices=[engine.value for engine in Engines])
+    parser.add_argument("--backend", default=Backends.MESA.value, choices=[backend.value for backend in Backends])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown or memory growth before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in build_cases(args):
+        # A fresh process per measurement keeps memory and warm caches from leaking between them
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(run_case, case).result()
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result["peak_memory_kib"] = executor.submit(measure_memory, case).result()
+        print(f"{case_key(case)}: {result['steps_per_second']:.1f} steps/s, {result['peak_memory_kib']} KiB")
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": results},
+                      file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+On-disk cache of simulation results, keyed by everything that determines a run: the Simulation
+parameters, the seed and the source of the model code. Re-running a sweep then only simulates the
+configurations that changed, and analysis or plotting can be iterated on without re-simulating.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from enum import Enum
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Modules whose code decides what a run produces; editing any of them invalidates the cache
+MODEL_MODULES = [
+    "agent.py", "aggregates.py", "arrivals.py", "checkpoint.py", "events.py", "metrics.py", "model.py",
+    "policies.py", "regimes.py", "simulation.py", "sweep.py", "vectorized.py",
+]
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in MODEL_MODULES:
+        digest.update(name.encode())
+        with open(os.path.join(directory, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def canonical(value):
+    # A JSON-friendly form of a parameter that is the same in every process. Objects without a stable
+    # representation (e.g. a custom Policy) fall back to repr, which includes their address, so runs
+    # using them simply never hit the cache
+    if isinstance(value, Enum):
+        return f"{type(value).__name__}.{value.name}"
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+def task_key(task):
+    """Hash of a sweep task's Simulation arguments, its seed and the current model code."""
+    description = {
+        "mode": canonical(task.mode),
+        "electric_chance": task.electric_chance,
+        "premium_chance": task.premium_chance,
+        "seed": task.seed,
+        "parameters": canonical(task.parameters),
+        "code": code_version(),
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    One compressed .npz file per run holding the metrics columns and the wait-time summary.
+    Reading an entry refreshes its modification time; once the directory grows past max_bytes
+    the least recently used entries are removed.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 ** 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """The (df, wait_time_summary) stored under key, or None."""
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                columns = [str(name) for name in data["columns"]]
+                df = pd.DataFrame({name: data[f"column_{name}"] for name in columns})
+                wait_time_summary = dict(zip((str(name) for name in data["wait_keys"]),
+                                             (float(value) for value in data["wait_values"])))
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            # A broken file, e.g. truncated by a crash or a full disk: drop it and treat as a miss
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path)
+        return df, wait_time_summary
+
+    def put(self, key, result):
+        df, wait_time_summary = result
+        arrays = {f"column_{name}": np.asarray(df[name]) for name in df.columns}
+        arrays["columns"] = np.array(list(df.columns))
+        arrays["wait_keys"] = np.array(list(wait_time_summary))
+        arrays["wait_values"] = np.array(list(wait_time_summary.values()), dtype=np.float64)
+
+        # Write to a temporary file and rename it, so readers never see a partial entry
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temporary, self.path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
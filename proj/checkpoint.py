@@ -0,0 +1,141 @@
+"""
+Snapshots of a ParkingLotModel's state: spot types, parked and queued cars with their timestamps,
+the clock, running totals and every random stream. A snapshot taken at minute m can be restored
+into a fresh headless model, of the same or another policy, which then carries on from minute m
+without re-running the first m minutes.
+"""
+import copy
+import pickle
+
+import numpy as np
+
+from agent import CarRecord
+from model import SPOT_COUNTS
+from vectorized import CAR_TYPES, TYPE_INDEX
+
+# Columns of the car tables; -1 marks a missing parked minute, dwell or spot
+CAR_COLUMNS = ["unique_id", "car_type", "created_minute", "parked_minute", "dwell", "spot"]
+
+
+def car_row(car, parked_minute=-1, dwell=None, spot=-1):
+    dwell = car.dwell if dwell is None else dwell
+    return [car.unique_id, TYPE_INDEX[car.car_type], car.created_minute, parked_minute,
+            -1 if dwell is None else dwell, spot]
+
+
+def parked_cars_in_order(model):
+    # The order cars are stepped in decides who gets which random draw, so keep it: the arrays' order
+    # for the NumPy backend, park order for headless models and the schedule's order with the grid
+    if model.parked_cars is not None:
+        return list(model.parked_cars.cars[:model.parked_cars.size])
+    if model.grid is None:
+        return list(model.active_cars)
+    return [agent for agent in model.schedule.agents if isinstance(agent, CarRecord) and agent.parked]
+
+
+def take_checkpoint(model):
+    """The state of `model` at its current minute, as a dict of arrays and plain values."""
+    # With event departures, each parked car's departure minute is already fixed; keep it as its dwell
+    departures = {}
+    if model.departures is not None:
+        departures = {car.unique_id: minute for minute, _, car in model.departures}
+
+    spot_index = {spot: index for index, spot in enumerate(model.spots)}
+    parked = []
+    for car in parked_cars_in_order(model):
+        dwell = None
+        if car.unique_id in departures:
+            dwell = departures[car.unique_id] - car.parked_minute
+        parked.append(car_row(car, car.parked_minute, dwell, spot_index[car.spot]))
+
+    state = {
+        "model_class": type(model).__name__,
+        "current_minutes": model.current_minutes,
+        "car_id": model.car_id,
+        "earnings": model.earnings,
+        "departed_cars": model.departed_cars,
+        "queue_stalled": model.queue_stalled,
+        "spot_pools": {
+            name: {TYPE_INDEX[spot_type]: np.array([spot_index[spot] for spot in pool], dtype=np.int64)
+                   for spot_type, pool in getattr(model, name).items()}
+            for name in model.spot_pools
+        },
+        "spot_types": np.array([TYPE_INDEX[spot.spot_type] for spot in model.spots], dtype=np.int8),
+        "parked": np.array(parked, dtype=np.int64).reshape(-1, len(CAR_COLUMNS)),
+        "queue": np.array([car_row(car) for car in model.queue], dtype=np.int64).reshape(-1, len(CAR_COLUMNS)),
+        "wait_time_stats": model.wait_time_stats,
+        "arrivals": model.arrivals,
+        "random": model.random.getstate(),
+        "departure_random": model.departure_random.getstate(),
+        "parked_cars_rng": model.parked_cars.rng.bit_generator.state if model.parked_cars is not None else None,
+        "policy_state": {name: getattr(model, name) for name in model.checkpoint_attributes},
+    }
+    # Copy everything that is shared with the live model, so the snapshot does not change as it runs
+    return copy.deepcopy(state)
+
+
+def restore_checkpoint(model, checkpoint):
+    """
+    Put a freshly created headless model into the checkpoint's state. The model needs the same number
+    of spots; its policy may differ (policy-specific state is only restored into the same class).
+    Future arrivals are the checkpoint's, so every model restored from one snapshot sees the same cars.
+    """
+    if model.grid is not None:
+        raise ValueError("Checkpoints can only be restored into headless models")
+    if model.current_minutes != 0 or model.car_id != 0:
+        raise ValueError("Checkpoints can only be restored into a model that has not run yet")
+    if len(model.spots) != len(checkpoint["spot_types"]):
+        raise ValueError(f"The checkpoint has {len(checkpoint['spot_types'])} spots, the model {len(model.spots)}")
+    checkpoint = copy.deepcopy(checkpoint)
+
+    for spot, type_index in zip(model.spots, checkpoint["spot_types"]):
+        if spot.spot_type != CAR_TYPES[type_index]:
+            spot.set_type(CAR_TYPES[type_index])
+    for spot_type, attribute in SPOT_COUNTS.items():
+        setattr(model, attribute, len(model.spots_by_type[spot_type]))
+
+    def new_car(row):
+        unique_id, type_index, created_minute, _, dwell, _ = (int(value) for value in row)
+        car = model.new_car(CAR_TYPES[type_index], created_minute, None if dwell < 0 else dwell)
+        car.unique_id = unique_id
+        return car
+
+    # park_car stamps cars with the model's clock, so run it at each car's parked minute. Rows are in
+    # stepping order, so the restored model shuffles its cars exactly as the original would have
+    for row in checkpoint["parked"]:
+        model.current_minutes = int(row[3])
+        model.park_car(new_car(row), model.spots[int(row[5])])
+    for row in checkpoint["queue"]:
+        car = new_car(row)
+        model.queue.append(car)
+        model.queued_by_type[car.car_type] += 1
+
+    for name, pools in checkpoint["spot_pools"].items():
+        setattr(model, name, {CAR_TYPES[type_index]: dict.fromkeys(model.spots[index] for index in indexes)
+                              for type_index, indexes in pools.items()})
+
+    model.current_minutes = checkpoint["current_minutes"]
+    model.car_id = checkpoint["car_id"]
+    model.earnings = checkpoint["earnings"]
+    model.departed_cars = checkpoint["departed_cars"]
+    model.queue_stalled = checkpoint["queue_stalled"]
+    model.wait_time_stats = checkpoint["wait_time_stats"]
+    model.arrivals = checkpoint["arrivals"]
+    model.random.setstate(checkpoint["random"])
+    model.departure_random.setstate(checkpoint["departure_random"])
+    if model.parked_cars is not None and checkpoint["parked_cars_rng"] is not None:
+        model.parked_cars.rng.bit_generator.state = checkpoint["parked_cars_rng"]
+    if checkpoint["model_class"] == type(model).__name__:
+        for name, value in checkpoint["policy_state"].items():
+            setattr(model, name, value)
+    return model
+
+
+def save_checkpoint(checkpoint, path):
+    with open(path, "wb") as file:
+        pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_checkpoint(path):
+    with open(path, "rb") as file:
+        return pickle.load(file)
@@ -0,0 +1,28 @@
+import contextlib
+import io
+
+import pytest
+
+from simulation import Simulation, Modes
+
+# A small lot that fills up and queues at the peak
+LOT = dict(width=12, height=13, total_spots=100, electric_percentage=0.1, premium_percentage=0.1,
+           electric_chance=0.1, max_queue_len=20, cars_added_per_step=4, headless=True)
+
+
+@pytest.fixture
+def make_simulation():
+    def make(mode, **parameters):
+        premium_chance = 0.1 if mode == Modes.MEMBERSHIP else 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            return Simulation(mode=mode, **dict(LOT, premium_chance=premium_chance, **parameters))
+    return make
+
+
+@pytest.fixture
+def run_for():
+    def run(simulation, horizon):
+        simulation.horizon = horizon
+        with contextlib.redirect_stdout(io.StringIO()):
+            return simulation.run_simulation()
+    return run
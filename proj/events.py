@@ -0,0 +1,43 @@
+class EventEngine:
+    """
+    Drive a ParkingLotModel by jumping between the minutes where something can happen
+    (arrivals, admissions from the queue, departures and policy changes) instead of stepping
+    every minute.
+
+    Each car's departure minute is sampled once when it parks and kept on a heap in the
+    model, so parked cars cost nothing while they wait to leave.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.model.enable_event_departures()
+
+    def next_event_minute(self):
+        model = self.model
+        next_minute = model.current_minutes + 1
+        candidates = [model.next_arrival_minute(), model.next_admission_minute(),
+                      model.next_departure_minute(), model.next_policy_minute()]
+        candidates = [minute for minute in candidates if minute is not None]
+        return max(next_minute, min(candidates)) if candidates else None
+
+    def run(self, end_minute, on_event):
+        """
+        Advance the model up to end_minute, calling on_event(minute) after every processed minute.
+        Minutes that are skipped leave the model state unchanged.
+        """
+        model = self.model
+        while model.current_minutes < end_minute:
+            next_minute = self.next_event_minute()
+            if next_minute is None or next_minute > end_minute:
+                self.skip_to(end_minute)
+                break
+
+            self.skip_to(next_minute - 1)
+            model.step()
+            on_event(model.current_minutes)
+
+    def skip_to(self, minute):
+        # Waiting times come from the cars' timestamps, so skipping only moves the clock
+        model = self.model
+        if minute > model.current_minutes:
+            model.current_minutes = minute
@@ -3,8 +3,18 @@ from mesa.visualization.ModularVisualization import ModularServer
 from model import PriorityModel, OnDemandModel, TimeBasedModel, MembershipModel
 from portrayal import parking_lot_portrayal
 from pipeline import run_pipeline
+from replication import run_replicated_pipeline
 
 interactive_GUI = False
+# Replicate each configuration until every metric's 95% confidence interval is within this fraction of
+# its mean, e.g. 0.05 for ±5% (None runs one day each)
+replication_half_width = None
+# Directory to write one cProfile stats file per configuration to (None disables profiling)
+profile_directory = None
+# Directory of cached simulation results, so only changed configurations are re-simulated (None disables it)
+result_cache_directory = "results_cache"
+# Directory the figures are written to
+report_directory = "figures"
 
 model_mapping = {
     "PriorityModel": PriorityModel,
@@ -35,5 +45,8 @@ if __name__ == "__main__":
         )
         server.port = 8521
         server.launch()
+    elif replication_half_width is not None:
+        run_replicated_pipeline(replication_half_width, relative=True)
     else:
-        run_pipeline()
+        run_pipeline(profile_dir=profile_directory, cache_dir=result_cache_directory,
+                     report_dir=report_directory)
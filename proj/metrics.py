@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from agent import Type
+
+COLUMNS = [
+    "time",
+    "parked_cars",
+    "waiting_cars",
+    "total_cars_parked",
+    "available_electric_spots",
+    "available_premium_spots",
+    "available_common_spots",
+    "total_electric_spots",
+    "total_premium_spots",
+    "total_common_spots",
+    "earnings",
+    "total_common_cars_parked",
+    "total_electric_cars_parked",
+    "total_premium_cars_parked",
+]
+
+
+class MetricsCollector:
+    """
+    Per-minute metrics written into preallocated NumPy columns.
+
+    Every value is read from counters the model keeps up to date on park, leave and spot
+    conversion, so recording a minute costs O(1) regardless of the lot size.
+
+    Without a sink the buffers cover the whole run and are handed to pandas without copying.
+    With a sink (see sinks.py) they hold chunk_size rows and every full chunk is flushed to it,
+    so memory stays flat however long the run is.
+
+    Runs that resume from a checkpoint pass the minute they start at: rows then cover the minutes
+    after it, and the time column keeps the model's own minutes.
+    """
+
+    def __init__(self, length, sink=None, chunk_size=1440, start_minute=0):
+        self.length = length
+        self.start_minute = start_minute
+        self.sink = sink
+        self.chunk_size = length if sink is None else min(chunk_size, length)
+        self.columns = {column: np.zeros(self.chunk_size, dtype=np.int64) for column in COLUMNS}
+        # Rows recorded so far, first row held in the buffers and the last recorded values
+        self.rows = 0
+        self.chunk_start = 0
+        self.last_values = None
+
+    def start(self, model):
+        # The state the run starts from, repeated in every row skipped before the first record
+        self.last_values = self.values(self.start_minute, model)
+
+    def record(self, minute, model):
+        # Minute start + m goes in row m - 1; rows skipped since the last record repeat the last state
+        row = minute - self.start_minute - 1
+        self.fill_to(row)
+
+        values = self.values(minute, model)
+        index = row - self.chunk_start
+        for column, value in values.items():
+            self.columns[column][index] = value
+        self.last_values = values
+        self.rows = row + 1
+        self.flush_if_full()
+
+    def values(self, minute, model):
+        parked_by_type = model.count_parked_cars()
+        parked_cars = sum(parked_by_type.values())
+        return {
+            "time": minute,
+            "parked_cars": parked_cars,
+            "waiting_cars": len(model.queue),
+            "total_cars_parked": parked_cars + model.departed_cars,
+            "available_electric_spots": model.count_free_spots(Type.ELECTRIC),
+            "available_premium_spots": model.count_free_spots(Type.PREMIUM),
+            "available_common_spots": model.count_free_spots(Type.NORMAL),
+            "total_electric_spots": model.electric_spots,
+            "total_premium_spots": model.premium_spots,
+            "total_common_spots": model.common_spots,
+            "earnings": model.earnings,
+            "total_common_cars_parked": parked_by_type[Type.NORMAL],
+            "total_electric_cars_parked": parked_by_type[Type.ELECTRIC],
+            "total_premium_cars_parked": parked_by_type[Type.PREMIUM],
+        }
+
+    def fill_to(self, rows):
+        # Forward-fill the rows between the last recorded minute and `rows`
+        if self.last_values is None:
+            return
+        while self.rows < rows:
+            start = self.rows - self.chunk_start
+            end = min(rows, self.chunk_start + self.chunk_size) - self.chunk_start
+            for column, values in self.columns.items():
+                values[start:end] = self.last_values[column]
+            first_minute = self.start_minute + self.rows + 1
+            self.columns["time"][start:end] = np.arange(first_minute, first_minute + end - start)
+            self.rows = self.chunk_start + end
+            self.flush_if_full()
+
+    def flush_if_full(self):
+        if self.sink is not None and self.rows - self.chunk_start == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        used = self.rows - self.chunk_start
+        if used:
+            self.sink.write_chunk({column: values[:used] for column, values in self.columns.items()})
+        self.chunk_start = self.rows
+
+    def to_dataframe(self):
+        """
+        The recorded metrics: a DataFrame, or the sink's reader when writing to a sink.
+        """
+        self.fill_to(self.length)
+        if self.sink is not None:
+            self.flush()
+            return self.sink.close()
+        return pd.DataFrame({column: values[:self.rows] for column, values in self.columns.items()}, copy=False)
@@ -1,25 +1,116 @@
 from mesa import Model
 from mesa.time import RandomActivation
 from mesa.space import MultiGrid
+import heapq
+import math
 import random
 from collections import deque
+from itertools import islice
+from enum import Enum
 
-from agent import Car, Spot, Type
+import numpy as np
+
+from agent import Car, CarPool, Spot, SpotRecord, Type, departure_delay, departure_delay_after
+from aggregates import WaitTimeStats
+from arrivals import ArrivalGenerator, peak_hour_curve
+from policies import Policy, PRIORITY_POLICY, TIME_BASED_POLICY, MEMBERSHIP_POLICY
+from profiling import PhaseTimers
+from regimes import peak_hours_schedule
+from vectorized import ParkedCars, CAR_TYPES
+
+
+class Backends(Enum):
+    MESA = "mesa"
+    NUMPY = "numpy"
+
+
+# Model attribute holding the number of spots of each type
+SPOT_COUNTS = {
+    Type.NORMAL: "common_spots",
+    Type.ELECTRIC: "electric_spots",
+    Type.PREMIUM: "premium_spots",
+}
+
+# Earnings per departed car, by car type
+TARIFFS = {
+    Type.NORMAL: 10,
+    Type.ELECTRIC: 15,
+    Type.PREMIUM: 20,
+}
 
 class ParkingLotModel(Model):
+    # Policy state carried over by checkpoints restored into a model of the same class
+    checkpoint_attributes = ()
+    # Per-type spot pools; their order decides which spot a car or a conversion gets, so
+    # checkpoints keep it
+    spot_pools = ("spots_by_type", "free_spots", "taken_spots")
+    # Methods timed by enable_phase_timers; policies add their own internals
+    timed_phases = ["step", "add_car_to_queue", "update_queue", "manage_parking", "adjust_spots",
+                    "advance_cars", "release_departures", "admit_car", "leave_park"]
+    # Which spots each car type may take and when queued cars are admitted (see policies.py)
+    policy = None
+
     def __init__(self, height, width, common_spots, electric_spots=0, premium_spots=0,
                  electric_chance=0, premium_chance=0, max_queue_size=10, cars_added_per_step=1,
-                 peak_hour_start=8, peak_hour_end=18):
+                 peak_hour_start=8, peak_hour_end=18, backend=Backends.MESA, seed=None,
+                 common_random_numbers=False, headless=False, hourly_demand=None, poisson_arrivals=False,
+                 policy=None):
         super().__init__()
 
-        self.grid = MultiGrid(width, height, torus=False)
+        if policy is not None:
+            self.policy = policy
+        if not isinstance(self.policy, Policy):
+            raise ValueError("A parking lot model needs a Policy")
+
+        # Independent random streams for arrivals, car types and departures. Without a seed the
+        # streams are drawn from the global random module, so random.seed still reproduces a run
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.reset_randomizer(seed)
+        arrival_seed, type_seed, departure_seed = np.random.SeedSequence(seed).spawn(3)
+        self.departure_random = random.Random(int(departure_seed.generate_state(1)[0]))
+
+        # With common random numbers each car's parking time is sampled when it arrives, so two
+        # models with the same seed see the same cars with the same parking times
+        self.common_random_numbers = common_random_numbers
+
+        # Headless runs keep only the spot table; the grid is for the ModularServer visualization.
+        # They also use plain slotted records instead of Mesa agents, with departed cars recycled
+        # through a pool, and step parked cars from their own table instead of the Mesa schedule.
+        # Cars are stepped in a different random order than with the schedule (see advance_cars), so
+        # a headless run and a grid run with the same seed give statistically equivalent, not
+        # identical, results
+        self.width = width
+        self.grid = None if headless else MultiGrid(width, height, torus=False)
+        self.car_pool = CarPool() if headless else None
+        self.active_cars = {}
+        # Queue cars drawn on row 0, and cars admitted from the head since the row was last drawn
+        self.queue_drawn = 0
+        self.queue_popped = 0
         self.queue = deque(maxlen=max_queue_size)
         self.schedule = RandomActivation(self)
         self.current_minutes = 0
-        self.graveyard = []
         self.cars_added_per_step = cars_added_per_step
         self.earnings = 0
 
+        # Running totals so metrics never have to scan the agents
+        self.parked_by_type = {car_type: 0 for car_type in Type}
+        self.queued_by_type = {car_type: 0 for car_type in Type}
+        self.departed_cars = 0
+        # Departed cars are only kept as waiting-time aggregates, so memory does not grow with the horizon
+        self.wait_time_stats = {car_type: WaitTimeStats() for car_type in Type}
+
+        # Set by enable_event_departures: heap of (departure minute, car id, car)
+        self.departures = None
+        self.queue_stalled = False
+
+        # When a list, arrivals turned away by a full queue are appended to it as (minute, car type)
+        # instead of being dropped, so a coordinator can redirect them to another lot (see city.py)
+        self.overflow = None
+
+        # Set by enable_phase_timers
+        self.phase_timers = None
+
         self.peak_hour_start = peak_hour_start
         self.peak_hour_end = peak_hour_end
 
@@ -35,6 +126,28 @@ class ParkingLotModel(Model):
         self.probabilities = [self.normal_chance, self.electric_chance, self.premium_chance]
         self.car_id = 0
 
+        # A day's arrivals and car types are drawn at once; Car agents are only created for the
+        # arrivals that get into the queue. hourly_demand gives the arrivals per minute for each
+        # hour of the day, instead of cars_added_per_step with the peak-hour increase
+        if hourly_demand is None:
+            hourly_demand = peak_hour_curve(cars_added_per_step, peak_hour_start, peak_hour_end)
+        dwell_rng = np.random.default_rng(departure_seed.spawn(1)[0]) if common_random_numbers else None
+        self.arrivals = ArrivalGenerator(hourly_demand, self.probabilities, np.random.default_rng(arrival_seed),
+                                         np.random.default_rng(type_seed), dwell_rng, poisson_arrivals)
+
+        # The NumPy backend keeps parked cars in arrays instead of stepping them as agents
+        self.backend = backend
+        self.parked_cars = None
+        if backend == Backends.NUMPY:
+            self.parked_cars = ParkedCars(self.total_spots, np.random.default_rng(departure_seed))
+
+        # All, free and occupied spots bucketed by type; dicts keep insertion order and give O(1)
+        # add/remove
+        self.spots = []
+        self.spots_by_type = {spot_type: {} for spot_type in Type}
+        self.free_spots = {spot_type: {} for spot_type in Type}
+        self.taken_spots = {spot_type: {} for spot_type in Type}
+
         self.create_spots()
         
     def create_spots(self):
@@ -47,297 +160,363 @@ class ParkingLotModel(Model):
 
         for count, spot_type in spot_types:
             for _ in range(count):
-                spot = Spot(self.spot_id, self, spot_type) if spot_type else Spot(self.spot_id, self)
-                self.grid.place_agent(spot, (x, y))
+                if self.grid is None:
+                    spot = SpotRecord(self.spot_id, self, spot_type)
+                else:
+                    spot = Spot(self.spot_id, self, spot_type)
+                    self.grid.place_agent(spot, (x, y))
+                    self.schedule.add(spot)
                 spot.set_position(x, y)
-                self.schedule.add(spot)
+                self.spots.append(spot)
+                self.spots_by_type[spot_type][spot] = None
+                self.free_spots[spot_type][spot] = None
                 x += 1
                 self.spot_id += 1
-                if x == self.grid.width:
+                if x == self.width:
                     x = 0
                     y += 1
 
     def add_car_to_queue(self):
-        current_hour = (self.current_minutes // 60) % 24
-
-        if self.peak_hour_start <= current_hour < self.peak_hour_end:
-            peak_mid = (self.peak_hour_start + self.peak_hour_end) / 2
-            if current_hour <= peak_mid:
-                multiplier = 1 + (current_hour - self.peak_hour_start) / (peak_mid - self.peak_hour_start) * 0.5
-            else:
-                multiplier = 1 + (self.peak_hour_end - current_hour) / (self.peak_hour_end - peak_mid) * 0.5
+        types, dwells = self.arrivals.at(self.current_minutes)
+        admitted = min(len(types), self.queue.maxlen - len(self.queue))
+        for index in range(admitted):
+            dwell = int(dwells[index]) if dwells is not None else None
+            car_type = CAR_TYPES[types[index]]
+            self.queue.append(self.new_car(car_type, self.current_minutes, dwell))
+            self.queued_by_type[car_type] += 1
+
+        if self.overflow is not None:
+            self.overflow.extend((self.current_minutes, CAR_TYPES[car_type]) for car_type in types[admitted:])
+
+    def enqueue_redirected(self, car_type, created_minute):
+        # A car turned away by another lot; returns False if the queue has no room for it either
+        if len(self.queue) == self.queue.maxlen:
+            return False
+        dwell = None
+        if self.common_random_numbers:
+            dwell = departure_delay(self.departure_random.random(), 25, 50, 75)
+        self.queue.append(self.new_car(car_type, created_minute, dwell))
+        self.queued_by_type[car_type] += 1
+        return True
+
+    def new_car(self, car_type, created_minute, dwell=None):
+        if self.car_pool is None:
+            car = Car(self.car_id, self, car_type, created_minute, dwell)
         else:
-            multiplier = 1
-
-        adjusted_cars = int(self.cars_added_per_step * multiplier)
-        for _ in range(adjusted_cars):
-            if len(self.queue) < self.queue.maxlen:
-                car_type = random.choices([Type.NORMAL, Type.ELECTRIC, Type.PREMIUM], self.probabilities)[0]
-                new_car = Car(self.car_id, self, car_type, self.current_minutes)
-                self.car_id += 1
-                self.queue.append(new_car)
+            car = self.car_pool.acquire(self.car_id, self, car_type, created_minute, dwell)
+        self.car_id += 1
+        return car
+
+    def mark_spot_taken(self, spot):
+        self.free_spots[spot.spot_type].pop(spot, None)
+        self.taken_spots[spot.spot_type][spot] = None
+
+    def mark_spot_free(self, spot):
+        self.taken_spots[spot.spot_type].pop(spot, None)
+        self.free_spots[spot.spot_type][spot] = None
+
+    def mark_spot_retyped(self, spot, previous_type):
+        self.spots_by_type[previous_type].pop(spot, None)
+        self.spots_by_type[spot.spot_type][spot] = None
+        pools = self.free_spots if spot.available else self.taken_spots
+        pools[previous_type].pop(spot, None)
+        pools[spot.spot_type][spot] = None
+
+    def convert_spots(self, from_type, to_type, count, free_only=False):
+        # Free spots first, then occupied ones (which take the new type for the next car)
+        spots = list(islice(self.free_spots[from_type], count))
+        if len(spots) < count and not free_only:
+            spots += islice(self.taken_spots[from_type], count - len(spots))
+        for spot in spots:
+            spot.set_type(to_type)
+
+        setattr(self, SPOT_COUNTS[from_type], getattr(self, SPOT_COUNTS[from_type]) - len(spots))
+        setattr(self, SPOT_COUNTS[to_type], getattr(self, SPOT_COUNTS[to_type]) + len(spots))
+        return len(spots)
+
+    def get_free_spot(self, spot_type):
+        # First free spot of the given type, or None
+        return next(iter(self.free_spots[spot_type]), None)
+
+    def count_free_spots(self, spot_type):
+        return len(self.free_spots[spot_type])
 
     def get_empty_spots(self):
         empty_spots = []
-        for agent in self.schedule.agents:
-            if isinstance(agent, Spot) and agent.available:
-                empty_spots.append(agent)
+        for spots in self.free_spots.values():
+            empty_spots.extend(spots)
         return empty_spots
             
     def update_queue(self):
-        # Clean queue representation
-        for cell in range(self.grid.width):
-            for agent in self.grid.get_cell_list_contents((cell, 0)):
-                if agent in self.queue:
-                    self.grid.remove_agent(agent)
-
-        # Insert cars on queue representation
-        queue_list = list(self.queue)  # Convert deque to list for slicing
-        for x, car in enumerate(queue_list[:self.grid.width]):  # Slice the list
-            if self.grid.is_cell_empty((x, 0)):  # Check if the cell is empty
-                self.grid.place_agent(car, (x, 0))
-                
+        if self.grid is None:
+            return
+
+        # Admitted cars were already taken off row 0 by park_car, so the cars still drawn shift left
+        # by the number of admissions and new arrivals are drawn after them
+        visible = min(len(self.queue), self.width)
+        kept = max(self.queue_drawn - self.queue_popped, 0)
+        if self.queue_popped:
+            for x, car in enumerate(islice(self.queue, kept)):
+                self.grid.move_agent(car, (x, 0))
+        for x, car in enumerate(islice(self.queue, kept, visible), start=kept):
+            self.grid.place_agent(car, (x, 0))
+
+        self.queue_drawn = visible
+        self.queue_popped = 0
+
+    def admit_car(self, spot):
+        # Park the car at the head of the queue
+        car = self.queue.popleft()
+        self.queued_by_type[car.car_type] -= 1
+        self.queue_popped += 1
+        self.park_car(car, spot)
+
     def park_car(self, car, spot):
-        self.grid.remove_agent(car)
-        self.grid.place_agent(car, (spot.x, spot.y))
         spot.park_car(car)
-        car.park_car(self.current_minutes)
-        self.schedule.add(car)
+        car.park_car(self.current_minutes, spot)
+        self.parked_by_type[car.car_type] += 1
+        if self.grid is not None and car.pos is not None:
+            self.grid.remove_agent(car)
+
+        if self.parked_cars is not None:
+            self.parked_cars.add(car, spot.unique_id, self.current_minutes)
+        elif self.grid is None:
+            self.active_cars[car] = None
+        else:
+            self.grid.place_agent(car, (spot.x, spot.y))
+            self.schedule.add(car)
 
-    def leave_park(self, car):
-        for agent in self.schedule.agents:
-            if isinstance(agent, Spot) and agent.current_car == car:
-                agent.unpark_car()
-                break
+        if self.departures is not None:
+            self.schedule_departure(car)
 
-        if car.get_type() == Type.NORMAL:
-            self.earnings += 10
-        elif car.get_type() == Type.ELECTRIC:
-            self.earnings += 15
-        elif car.get_type() == Type.PREMIUM:
-            self.earnings += 20
+    def schedule_departure(self, car):
+        dwell = car.dwell
+        if dwell is None:
+            elapsed = self.current_minutes - car.parked_minute
+            dwell = departure_delay_after(self.departure_random.random(), elapsed, 25, 50, 75)
+        heapq.heappush(self.departures, (car.parked_minute + dwell, car.unique_id, car))
 
-        self.grid.remove_agent(car)
-        self.graveyard.append(car)
-        self.schedule.remove(car)
+    def leave_park(self, car):
+        spot = car.spot
+        if spot is not None:
+            spot.unpark_car()
+            car.spot = None
+
+        self.earnings += TARIFFS[car.get_type()]
+        self.parked_by_type[car.car_type] -= 1
+        self.departed_cars += 1
+        self.queue_stalled = False
+
+        self.wait_time_stats[car.car_type].add(car.waiting_time)
+        if self.car_pool is not None:
+            self.active_cars.pop(car, None)
+            self.car_pool.release(car)
+            return
+
+        # Mesa keeps every agent registered on the model until it is removed
+        car.remove()
+        if self.parked_cars is None:
+            self.grid.remove_agent(car)
+            self.schedule.remove(car)
+
+    def enable_event_departures(self):
+        # Sample each car's departure once at park time instead of drawing every step
+        if self.parked_cars is not None:
+            raise ValueError("Event departures are not supported with the NumPy backend")
+        self.departures = []
+        # Cars already parked (restored from a checkpoint) leave conditionally on their time parked so far
+        for car in self.active_cars:
+            self.schedule_departure(car)
+
+    def enable_phase_timers(self):
+        self.phase_timers = PhaseTimers()
+        for name in self.timed_phases:
+            setattr(self, name, self.phase_timers.wrap(name, getattr(self, name)))
+        return self.phase_timers
+
+    def next_departure_minute(self):
+        return self.departures[0][0] if self.departures else None
+
+    def advance_cars(self):
+        # With event departures, parked cars have nothing to do until their departure minute
+        if self.departures is not None:
+            return
+
+        if self.parked_cars is not None:
+            for car in self.parked_cars.draw_departures(self.current_minutes):
+                car.leave(self.current_minutes)
+                self.leave_park(car)
+        elif self.grid is None:
+            # Random order, as RandomActivation would step them. The schedule also shuffles every
+            # spot agent with the cars; reproducing its draws would cost O(spots) per minute, so
+            # the order (and with it which cars leave) differs from a grid run of the same seed
+            cars = list(self.active_cars)
+            self.random.shuffle(cars)
+            for car in cars:
+                car.step()
+        else:
+            self.schedule.step()
+
+    def count_parked_cars(self):
+        return dict(self.parked_by_type)
+
+    def release_departures(self):
+        while self.departures and self.departures[0][0] <= self.current_minutes:
+            _, _, car = heapq.heappop(self.departures)
+            car.leave(self.current_minutes)
+            self.leave_park(car)
+
+    def next_policy_minute(self):
+        # Next minute at which the parking policy changes on its own, if any
+        return None
+
+    def next_arrival_minute(self):
+        # Arrivals to a full queue are dropped without changing anything, unless they overflow
+        if len(self.queue) == self.queue.maxlen and self.overflow is None:
+            return None
+        return self.arrivals.next_arrival(self.current_minutes + 1)
+
+    def next_admission_minute(self):
+        # When the head of the queue can next be parked: once it has waited long enough, or, if it
+        # already has and found no spot, only after a departure or policy change
+        if not self.queue:
+            return None
+        first_car = self.queue[0]
+        if not self.policy.admissible(first_car):
+            return self.policy.admission_minute(first_car)
+        return None if self.queue_stalled else self.current_minutes + 1
 
     def step(self):
         self.current_minutes += 1
-        if len(self.queue) < self.queue.maxlen:
+        if len(self.queue) < self.queue.maxlen or self.overflow is not None:
             self.add_car_to_queue()
 
         self.update_queue()
-        self.get_empty_spots()
+        self.manage_parking()
+        self.advance_cars()
+        if self.departures is not None:
+            self.release_departures()
 
-        for _ in range(self.cars_added_per_step * 2):
-            queueSize = len(self.queue)
-            self.manage_parking(self.get_empty_spots())
-            if len(self.queue) == queueSize or len(self.queue) <= 0:
-                break
-
-        self.schedule.step()
+    def adjust_spots(self):
+        # Policies that re-type spots over time do it here, before cars are matched
+        pass
 
     def manage_parking(self):
-        raise NotImplementedError("Subclasses must implement this method")
+        self.adjust_spots()
+
+        # Admit cars from the head of the queue, first come first served, until one has not waited
+        # long enough or the policy finds it no spot
+        policy = self.policy
+        queue = self.queue
+        while queue:
+            first_car = queue[0]
+            if not policy.admissible(first_car):
+                break
+            spot = policy.match(first_car, self.free_spots)
+            if spot is None:
+                break
+            self.admit_car(spot)
+        self.queue_stalled = bool(queue)
 
 
 class PriorityModel(ParkingLotModel):
-    def manage_parking(self, empty_spots):
-        for car in self.queue:
-            car.increment_waiting_time()
-
-        # Handle queue and parking logic for Priority
-        if len(self.queue) > 0:
-            first_car = self.queue[0]
-            if first_car.waiting_time > 2:  # Ensure the car has waited at least two steps
-                electric_spot_found = False
-                backup_normal_spot = None
-                for spot in empty_spots:
-                    if first_car.get_type() == Type.NORMAL and spot.get_type() == Type.NORMAL:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        break
-                    elif first_car.get_type() == Type.ELECTRIC and spot.get_type() == Type.ELECTRIC:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        electric_spot_found = True
-                        break
-                    
-                    if backup_normal_spot is None:
-                        if spot.get_type() == Type.NORMAL and spot.is_available():
-                            backup_normal_spot = spot
-
-                if first_car.get_type() == Type.ELECTRIC and not electric_spot_found:
-                    if backup_normal_spot is not None:
-                        self.park_car(first_car, backup_normal_spot)
-                        self.queue.popleft()
-
-        self.schedule.step()
-        
+    policy = PRIORITY_POLICY
+
+
 class OnDemandModel(ParkingLotModel):
-    def update_parking_spots(self):
-        # Update the number of parking spots based on demand
-        for agent in self.schedule.agents:
-            if isinstance(agent, Spot) and agent.available and agent.spot_type == Type.NORMAL:
-                agent.spot_type = Type.ELECTRIC
-                self.electric_spots += 1
-                self.common_spots -= 1
-                break
-        print("Updating parking spots.")
-    
-    def calculate_ev_demand(self, empty_spots):
-        if not any(spot.spot_type == Type.ELECTRIC and spot.available for spot in empty_spots):
-            return True
-        return False
+    # Same spot preferences as the priority scheme, with the electric spots following the demand
+    policy = PRIORITY_POLICY
+    checkpoint_attributes = ("next_control_minute",)
+    timed_phases = ParkingLotModel.timed_phases + ["update_parking_spots", "convert_spots"]
+
+    def __init__(self, *args, control_interval=15, ev_headroom=0.2, hysteresis=0.1, min_step=1,
+                 min_electric_share=0.05, max_electric_share=0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Every control_interval minutes the electric spots are moved towards the EV demand (electric
+        # cars parked or queued) plus ev_headroom, within the share bounds. Differences within
+        # `hysteresis` of the current count are left alone so the split does not flap, and so are
+        # differences of fewer than min_step spots
+        self.control_interval = control_interval
+        self.ev_headroom = ev_headroom
+        self.hysteresis = hysteresis
+        self.min_step = min_step
+        self.min_electric_share = min_electric_share
+        self.max_electric_share = max_electric_share
+        self.next_control_minute = 0
+
+    def next_policy_minute(self):
+        return max(self.next_control_minute, self.current_minutes + 1)
+
+    def calculate_ev_demand(self):
+        return self.count_free_spots(Type.ELECTRIC) == 0
 
     def calculate_demand(self):
+        # Electric cars parked or waiting, as a share of the spots
         total_spots = self.common_spots + self.electric_spots
-        electric_demand = sum(1 for spot in self.get_empty_spots() if spot.spot_type == Type.ELECTRIC)
+        electric_demand = self.parked_by_type[Type.ELECTRIC] + self.queued_by_type[Type.ELECTRIC]
         return electric_demand / total_spots if total_spots > 0 else 0
 
-    def change_spots(self, normal_percentage, electric_percentage):
+    def target_electric_spots(self):
         total_spots = self.common_spots + self.electric_spots
-        new_common_spots = int(total_spots * normal_percentage)
-        new_electric_spots = int(total_spots * electric_percentage)
-
-        if new_common_spots > self.common_spots:
-            self.common_spots = new_common_spots
-        elif new_common_spots < self.common_spots:
-            self.common_spots = new_common_spots
-
-        if new_electric_spots > self.electric_spots:
-            self.electric_spots = new_electric_spots
-        elif new_electric_spots < self.electric_spots:
-            self.electric_spots = new_electric_spots
-
-    def manage_parking(self, empty_spots):
-        # Handle queue and parking logic for OnDemand
-        for car in self.queue:
-            car.increment_waiting_time()
-            
-        if len(self.queue) > 0:
-            first_car = self.queue[0]
-            if first_car.waiting_time > 2:  # Ensure the car has waited at least two step
-                electric_spot_found = False
-                backup_normal_spot = None
-                for spot in empty_spots:
-                    if first_car.get_type() == Type.NORMAL and spot.get_type() == Type.NORMAL:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        break
-                    elif first_car.get_type() == Type.ELECTRIC and spot.get_type() == Type.ELECTRIC:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        electric_spot_found = True
-                        break
-                    if backup_normal_spot is None:
-                        if spot.get_type() == Type.NORMAL and spot.is_available():
-                            backup_normal_spot = spot
-
-                if first_car.get_type() == Type.ELECTRIC and not electric_spot_found:
-                    if backup_normal_spot is not None:
-                        self.park_car(first_car, backup_normal_spot)
-                        self.queue.popleft()
-
-        demand = self.calculate_demand()
-        self.change_spots(normal_percentage=(1 - demand), electric_percentage=demand)
-
-        self.schedule.step()
-        
-class TimeBasedModel(ParkingLotModel):
-    def convert_spots(self, from_type, to_type, count):
-        converted = 0
-        for agent in self.schedule.agents:
-            if isinstance(agent, Spot) and agent.spot_type == from_type:
-                agent.spot_type = to_type
-                converted += 1
-                if converted == count:
-                    break
-
-    def change_spots(self, common_percentage, electric_percentage):
-        total_spots = self.common_spots + self.electric_spots
-        desired_common = int(total_spots * common_percentage)
-        desired_electric = int(total_spots * electric_percentage)
-
-        if self.common_spots < desired_common:
-            self.convert_spots(Type.ELECTRIC, Type.NORMAL, desired_common - self.common_spots)
-        elif self.common_spots > desired_common:
-            self.convert_spots(Type.NORMAL, Type.ELECTRIC, self.common_spots - desired_common)
-
-        self.common_spots = desired_common
-        self.electric_spots = desired_electric
-
-    def manage_parking(self, empty_spots):
-        current_hour = (self.current_minutes // 60) % 24
+        share = min(max(self.calculate_demand() * (1 + self.ev_headroom), self.min_electric_share),
+                    self.max_electric_share)
+        return math.ceil(total_spots * share)
 
-        if self.peak_hour_start <= current_hour < self.peak_hour_end:
-            self.change_spots(common_percentage=0.9, electric_percentage=0.1)
+    def update_parking_spots(self):
+        # Re-type free spots towards the target; spots in use are picked up on a later interval
+        change = self.target_electric_spots() - self.electric_spots
+        if abs(change) < self.min_step or abs(change) <= self.hysteresis * self.electric_spots:
+            return
+        if change > 0:
+            self.convert_spots(Type.NORMAL, Type.ELECTRIC, change, free_only=True)
         else:
-            self.change_spots(common_percentage=0.8, electric_percentage=0.2)
+            self.convert_spots(Type.ELECTRIC, Type.NORMAL, -change, free_only=True)
+
+    def adjust_spots(self):
+        if self.current_minutes >= self.next_control_minute:
+            self.update_parking_spots()
+            self.next_control_minute = self.current_minutes + self.control_interval
 
-        # Handle queue and parking logic
-        for car in self.queue:
-            car.increment_waiting_time()
 
-        if len(self.queue) > 0:
-            first_car = self.queue[0]
-            if first_car.waiting_time > 2:  # Ensure the car has waited at least two steps
-                for spot in empty_spots:
-                    if spot.get_type() == first_car.get_type() or spot.get_type() == Type.NORMAL:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        break
+class TimeBasedModel(ParkingLotModel):
+    policy = TIME_BASED_POLICY
+    checkpoint_attributes = ("next_regime_minute",)
+    timed_phases = ParkingLotModel.timed_phases + ["change_spots", "convert_spots"]
+
+    def __init__(self, *args, allocation_schedule=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Target split of the spots over time (see regimes.py); by default 90/10 normal/electric
+        # during the peak hours and 80/20 outside them
+        if allocation_schedule is None:
+            allocation_schedule = peak_hours_schedule(self.peak_hour_start, self.peak_hour_end)
+        self.allocation_schedule = allocation_schedule
+        # The split is only revisited at the schedule's transition minutes
+        self.next_regime_minute = 0
+
+    def next_policy_minute(self):
+        return self.allocation_schedule.next_change(self.current_minutes)
+
+    def change_spots(self, allocation):
+        spot_types = list(allocation)
+        total_spots = sum(getattr(self, SPOT_COUNTS[spot_type]) for spot_type in spot_types)
+        desired = {spot_type: int(total_spots * allocation[spot_type]) for spot_type in spot_types}
+        # Spots lost to rounding go to the first type of the allocation
+        desired[spot_types[0]] += total_spots - sum(desired.values())
+
+        surplus = {spot_type: getattr(self, SPOT_COUNTS[spot_type]) - desired[spot_type] for spot_type in spot_types}
+        for from_type in spot_types:
+            for to_type in spot_types:
+                count = min(surplus[from_type], -surplus[to_type])
+                if count > 0:
+                    self.convert_spots(from_type, to_type, count)
+                    surplus[from_type] -= count
+                    surplus[to_type] += count
+
+    def adjust_spots(self):
+        if self.current_minutes >= self.next_regime_minute:
+            self.change_spots(self.allocation_schedule.allocation_at(self.current_minutes))
+            self.next_regime_minute = self.allocation_schedule.next_change(self.current_minutes)
 
-        self.schedule.step()
 
-        
 class MembershipModel(ParkingLotModel):
-    def manage_parking(self, empty_spots):
-        for car in self.queue:
-            car.increment_waiting_time()
-
-        # Handle queue and parking logic for Priority
-        if len(self.queue) > 0:
-            first_car = self.queue[0]
-            if first_car.waiting_time > 2:  # Ensure the car has waited at least two steps
-                electric_spot_found = False
-                premium_spot_found = False
-                backup_normal_spot = None
-                backup_electric_spot = None
-                for spot in empty_spots:
-                    if first_car.get_type() == Type.NORMAL and spot.get_type() == Type.NORMAL:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        break
-                    elif first_car.get_type() == Type.ELECTRIC and spot.get_type() == Type.ELECTRIC:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        electric_spot_found = True
-                        break
-                    elif first_car.get_type() == Type.PREMIUM and spot.get_type() == Type.PREMIUM:
-                        self.park_car(first_car, spot)
-                        self.queue.popleft()
-                        premium_spot_found = True
-                        break
-                    
-                    if backup_normal_spot is None:
-                        if spot.get_type() == Type.NORMAL and spot.is_available():
-                            backup_normal_spot = spot
-                    if backup_electric_spot is None:
-                        if spot.get_type() == Type.ELECTRIC and spot.is_available():
-                            backup_electric_spot = spot
-
-                if first_car.get_type() == Type.ELECTRIC and not electric_spot_found and backup_normal_spot is not None:
-                    self.park_car(first_car, backup_normal_spot)
-                    self.queue.popleft()
-                        
-                elif first_car.get_type() == Type.PREMIUM and not premium_spot_found:
-                    if backup_normal_spot is not None:
-                        self.park_car(first_car, backup_normal_spot)
-                        self.queue.popleft()
-                    elif backup_electric_spot is not None:
-                        self.park_car(first_car, backup_electric_spot)
-                        self.queue.popleft()
-                    
-        self.schedule.step()
-        
\ No newline at end of file
+    policy = MEMBERSHIP_POLICY
@@ -1,6 +1,8 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-from simulation import Simulation, Modes
+from cache import ResultCache, task_key
+from report import render_report, run_series
+from simulation import Modes
+from sweep import build_tasks, run_sweep
 from collections import defaultdict
 
 configurations = [
@@ -18,6 +20,18 @@ configurations = [
     ("Config 3", Modes.MEMBERSHIP, 0.7, 0.15, 0.15),
 ]
 
+simulation_parameters = {
+    "width": 12,
+    "height": 12,
+    "total_spots": 100,
+    "max_queue_len": 20,
+    "cars_added_per_step": 4,
+    "peak_hour_start": 8,
+    "peak_hour_end": 18,
+    # Batch runs never render the lot, so skip the grid
+    "headless": True,
+}
+
 def analyze_data(df, wait_time_df, show_premium=False):
     total_parked_cars = df["total_cars_parked"].iloc[-1]
     max_waiting_cars = df["waiting_cars"].max()
@@ -38,7 +52,10 @@ def analyze_data(df, wait_time_df, show_premium=False):
         "total_earnings": round(total_earnings, 2),
         "average_wait_time": round(wait_time_df["total"], 2),
         "average_wait_time_common_cars": round(wait_time_df["Normal"], 2),
-        "average_wait_time_electric_cars": round(wait_time_df["Electric"], 2)
+        "average_wait_time_electric_cars": round(wait_time_df["Electric"], 2),
+        "wait_time_p50": round(wait_time_df["p50"], 2),
+        "wait_time_p95": round(wait_time_df["p95"], 2),
+        "wait_time_p99": round(wait_time_df["p99"], 2),
     }
     if show_premium:
         summary["average_available_premium_spots"] = round(available_premium_spots, 2)
@@ -46,153 +63,62 @@ def analyze_data(df, wait_time_df, show_premium=False):
     return summary
 
 
-def visualize_model_results(results, model_title, include_total_spots):
-    n_cols = 3 + int(include_total_spots)
-    n_configs = len(results)
-    fig, axes = plt.subplots(n_configs, n_cols, figsize=(6 * n_cols, 6 * n_configs))  # Adjusted display size
-    fig.suptitle(f"Results for {model_title}", fontsize=12)  # Smaller title font
-    if n_configs == 1:
-        axes = [axes]  # Ensure axes is iterable for a single configuration
-
-    for idx, (summary, df, electric_chance, premium_chance, title) in enumerate(results):
-        # Filter the DataFrame to include only time >= 60
-        df_filtered = df[df["time"] >= 60]
-        hours = df_filtered["time"] / 60
-        summary_text = "\n".join([f"{key}: {value}" for key, value in summary.items()])
-
-        # Summary Text
-        axes[idx][0].axis("off")
-        axes[idx][0].text(0.5, 0.5, summary_text, fontsize=8, ha="center", va="center")  # Smaller text
-        axes[idx][0].set_title(f"Summary: {title}", fontsize=10)  # Smaller font size
-
-        # Earnings Over Time
-        axes[idx][1].plot(hours, df_filtered["earnings"], label="Earnings")
-        if idx == 0:
-            axes[idx][1].set_title("Earnings Over Time", fontsize=10)  # Smaller font size
-        axes[idx][1].set_xlabel("Hour of the Day", fontsize=8)
-        axes[idx][1].set_ylabel("Earnings (€)", fontsize=8)
-        axes[idx][1].legend(fontsize=8)
-        axes[idx][1].grid(True)
-
-        # Cars Parked and Waiting Over Time
-        axes[idx][2].plot(hours, df_filtered["parked_cars"], label="Parked Cars")
-        axes[idx][2].plot(hours, df_filtered["waiting_cars"], label="Waiting Cars")
-        axes[idx][2].plot(
-            hours,
-            df_filtered["parked_cars"].rolling(window=20).median(),
-            label="Rolling Median (Parked Cars)",
-            linestyle="--"
-        )
-        axes[idx][2].plot(
-            hours,
-            df_filtered["waiting_cars"].rolling(window=20).median(),
-            label="Rolling Median (Waiting Cars)",
-            linestyle="--"
-        )
-        if idx == 0:
-            axes[idx][2].set_title("Cars Parked and Waiting Over Time", fontsize=10)  # Smaller font size
-        axes[idx][2].set_xlabel("Hour of the Day", fontsize=8)
-        axes[idx][2].set_ylabel("Number of Cars", fontsize=8)
-        axes[idx][2].legend(fontsize=8)
-        axes[idx][2].grid(True)
-
-        # Total Parking Spots Over Time
-        if include_total_spots and df_filtered["total_common_spots"].nunique() > 1:
-            axes[idx][3].plot(hours, df_filtered["total_common_spots"], label="Total Common Spots")
-            if electric_chance > 0:
-                axes[idx][3].plot(hours, df_filtered["total_electric_spots"], label="Total Electric Spots")
-            if premium_chance > 0:
-                axes[idx][3].plot(hours, df_filtered["total_premium_spots"], label="Total Premium Spots")
-            if idx == 0:
-                axes[idx][3].set_title("Total Parking Spots Over Time", fontsize=10)  # Smaller font size
-            axes[idx][3].set_xlabel("Hour of the Day", fontsize=8)
-            axes[idx][3].set_ylabel("Total Spots", fontsize=8)
-            axes[idx][3].legend(fontsize=8)
-            axes[idx][3].grid(True)
-
-    plt.subplots_adjust(wspace=0.4, hspace=0.6)
-    plt.tight_layout(rect=(0, 0, 1, 0.96))
-    plt.show()
-
-
-def visualize_combined_results(combined_data):
-    n_configs = len(combined_data)
-    fig, axes = plt.subplots(2 * n_configs, 2, figsize=(14, 6 * n_configs))
-
-    if n_configs == 1:
-        axes = [axes]
-
-    for idx, (config_title, model_results) in enumerate(combined_data.items()):
-        axes[idx * 2][0].axis("off")
-        axes[idx * 2][0].text(0.5, 0.5, config_title, fontsize=10, ha="center", va="center")
-
-        for df, model_title in [(result[1], result[2].split()[0]) for result in model_results]:
-            df = df[df["time"] >= 60]
-            hours = df["time"] / 60
-            rolling_common = df["total_common_cars_parked"].rolling(window=30).median()
-            rolling_electric = df["total_electric_cars_parked"].rolling(window=20).median()
-
-            axes[idx * 2 + 1][0].plot(hours, rolling_common, label=f"{model_title}")
-            axes[idx * 2 + 1][0].set_title("Common Cars Parked Over Time (Rolling Median)", fontsize=10)
-            axes[idx * 2 + 1][0].set_xlabel("Hour of the Day", fontsize=8)
-            axes[idx * 2 + 1][0].set_ylabel("Common Cars Parked", fontsize=8)
-            axes[idx * 2 + 1][0].legend(fontsize=8, loc='upper left', bbox_to_anchor=(1, 1))
-            axes[idx * 2 + 1][0].grid(True)
-
-            axes[idx * 2 + 1][1].plot(hours, rolling_electric, label=f"{model_title}")
-            if model_title == "Membership":
-                rolling_premium = df["total_premium_cars_parked"].rolling(window=20).median()
-                axes[idx * 2 + 1][1].plot(hours, rolling_premium, label=f"Membership - Premium")
-            axes[idx * 2 + 1][1].set_title("Electric Cars Parked Over Time (Rolling Median)", fontsize=10)
-            axes[idx * 2 + 1][1].set_xlabel("Hour of the Day", fontsize=8)
-            axes[idx * 2 + 1][1].set_ylabel("Cars Parked", fontsize=8)
-            axes[idx * 2 + 1][1].legend(fontsize=8, loc='upper left', bbox_to_anchor=(1, 1))
-            axes[idx * 2 + 1][1].grid(True)
-
-            total_earnings = df["earnings"].iloc[-1]/1000
-            axes[idx * 2][1].bar(model_title, total_earnings)
-            axes[idx * 2][1].set_title("Total Earnings per Mode", fontsize=10)
-            axes[idx * 2][1].set_xlabel("Modes", fontsize=8)
-            axes[idx * 2][1].set_ylabel("Total Earnings (K€)", fontsize=8)
-            axes[idx * 2][1].tick_params(axis='x', labelsize=8)
-            if model_title == "Time-based":
-                axes[idx * 2][1].set_ylim(bottom=total_earnings - 10)
-            axes[idx * 2][1].grid(True)
-    plt.tight_layout(rect=(0, 0, 0.85, 0.95))
-    plt.subplots_adjust(wspace=0.5, hspace=0.98, right=0.85)
-    plt.show()
-
-
-def run_pipeline():
+def cached_sweep(tasks, cache, workers=None):
+    # Yield cached results first, then run only the tasks that missed and store what they produce
+    missing = []
+    for task in tasks:
+        result = cache.get(task_key(task))
+        if result is None:
+            missing.append(task)
+        else:
+            yield task, result, None
+
+    for task, result, error in run_sweep(missing, workers):
+        if error is None:
+            cache.put(task_key(task), result)
+        yield task, result, error
+
+
+def run_pipeline(workers=None, seed=0, profile_dir=None, cache_dir=None, report_dir="figures"):
     model_results = defaultdict(list)
     combined_data = defaultdict(list)
 
-    for config_title, mode, normal_chance, electric_chance, premium_chance in configurations:
-        simulation = Simulation(
-            width=12,
-            height=12,
-            total_spots=100,
-            electric_percentage=electric_chance,
-            premium_percentage=premium_chance,
-            electric_chance=electric_chance,
-            premium_chance=premium_chance,
-            mode=mode,
-            max_queue_len=20,
-            cars_added_per_step=4,
-            peak_hour_start=8,
-            peak_hour_end=18
-        )
-        df, wait_time_df = simulation.run_simulation()
-        summary = analyze_data(df, wait_time_df, premium_chance != 0)
-        title = f"{mode.value} - Normal: {normal_chance}, Electric: {electric_chance}, Premium: {premium_chance}"
+    parameters = simulation_parameters
+    if profile_dir is not None:
+        # Every configuration's run is wrapped in cProfile and its stats written to profile_dir
+        parameters = dict(simulation_parameters, profile_dir=profile_dir)
+
+    tasks = build_tasks(configurations, parameters, seed=seed)
+    # Profiling needs the runs to actually happen, so it bypasses the cache
+    if cache_dir is None or profile_dir is not None:
+        results = run_sweep(tasks, workers)
+    else:
+        results = cached_sweep(tasks, ResultCache(cache_dir), workers)
+
+    finished = {}
+    for task, result, error in results:
+        title = f"{task.mode.value} - Normal: {task.normal_chance}, Electric: {task.electric_chance}, Premium: {task.premium_chance}"
+        if error is not None:
+            print(f"\nSimulation failed for {title}: {error!r}")
+            continue
+
+        df, wait_time_df = result
+        summary = analyze_data(df, wait_time_df, task.premium_chance != 0)
         print(f"\nSummary for {title}")
         for key, value in summary.items():
             print(f"{key}: {value}")
-        model_results[mode].append((summary, df, electric_chance, premium_chance, title))
-        combined_data[config_title].append((summary, df, title))
-
-    for mode, results in model_results.items():
-        visualize_model_results(results, f"{mode.value} Model", include_total_spots=mode == Modes.ON_DEMAND)
-
-    visualize_combined_results(combined_data)
-
+        # Rolling medians and decimation are done once here; the figures only draw the reduced series
+        finished[task.index] = (summary, run_series(df), title)
+
+    # Runs finish in any order; plot them in configuration order
+    for task in tasks:
+        if task.index not in finished:
+            continue
+        summary, series, title = finished[task.index]
+        model_results[task.mode].append((summary, series, task.electric_chance, task.premium_chance, title))
+        combined_data[task.config_title].append((series, title.split()[0]))
+
+    model_figures = [(mode.name.lower(), f"{mode.value} Model", results, mode == Modes.ON_DEMAND)
+                     for mode, results in model_results.items()]
+    for path in render_report(model_figures, dict(combined_data), report_dir, workers):
+        print(f"Saved {path}")
@@ -0,0 +1,52 @@
+from agent import Type
+
+
+class Policy:
+    """
+    A parking scheme as configuration: for every car type, the spot types it may take in order of
+    preference, and how many minutes a car has to wait in the queue before it is admitted.
+
+    Matching a car walks its chain over the model's per-type free-spot pools, so it costs
+    O(chain length) whatever the size of the lot. Car types without a chain are never admitted.
+    """
+
+    def __init__(self, preferences, admission_wait=2):
+        self.preferences = {car_type: tuple(preferences.get(car_type, ())) for car_type in Type}
+        # Cars are admitted once this many minutes have passed since they arrived
+        self.admission_wait = admission_wait
+
+    def admissible(self, car):
+        return car.waiting_time >= self.admission_wait
+
+    def admission_minute(self, car):
+        # First minute at which a queued car becomes admissible
+        return car.created_minute + self.admission_wait
+
+    def match(self, car, free_spots):
+        # First free spot along the car type's preference chain, or None
+        for spot_type in self.preferences[car.car_type]:
+            pool = free_spots[spot_type]
+            if pool:
+                return next(iter(pool))
+        return None
+
+
+# Electric cars fall back to a normal spot
+PRIORITY_POLICY = Policy({
+    Type.NORMAL: [Type.NORMAL],
+    Type.ELECTRIC: [Type.ELECTRIC, Type.NORMAL],
+})
+
+# Every car takes a spot of its own type, else a normal one
+TIME_BASED_POLICY = Policy({
+    Type.NORMAL: [Type.NORMAL],
+    Type.ELECTRIC: [Type.ELECTRIC, Type.NORMAL],
+    Type.PREMIUM: [Type.PREMIUM, Type.NORMAL],
+})
+
+# Premium members fall back to a normal spot, then to an electric one
+MEMBERSHIP_POLICY = Policy({
+    Type.NORMAL: [Type.NORMAL],
+    Type.ELECTRIC: [Type.ELECTRIC, Type.NORMAL],
+    Type.PREMIUM: [Type.PREMIUM, Type.NORMAL, Type.ELECTRIC],
+})
@@ -0,0 +1,49 @@
+import time
+from collections import defaultdict
+
+
+class PhaseTimers:
+    """
+    Cumulative wall time and call count per named phase.
+
+    Timing is switched on per model (ParkingLotModel.enable_phase_timers) by shadowing the timed
+    methods with wrapped ones on the instance, so a model that never enables it runs the plain methods.
+    Times are inclusive: a phase that calls another one (manage_parking calls adjust_spots and admit_car)
+    includes it.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def wrap(self, name, function):
+        seconds = self.seconds
+        calls = self.calls
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+
+        return timed
+
+    def report(self):
+        """Phase -> {"calls", "seconds", "mean_us"}, slowest phase first."""
+        return {
+            name: {
+                "calls": self.calls[name],
+                "seconds": seconds,
+                "mean_us": seconds / self.calls[name] * 1e6 if self.calls[name] else 0.0,
+            }
+            for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])
+        }
+
+
+def print_report(report):
+    print(f"{'phase':<22}{'calls':>10}{'seconds':>12}{'mean (us)':>12}")
+    for name, phase in report.items():
+        print(f"{name:<22}{phase['calls']:>10}{phase['seconds']:>12.4f}{phase['mean_us']:>12.2f}")
@@ -0,0 +1,61 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+from agent import Type
+
+# From `minute` (counted from the start of the schedule's period) the lot should be split by
+# `allocation`, a dict of spot type -> share of the spots of those types
+Transition = namedtuple("Transition", ["minute", "allocation"])
+
+PEAK_ALLOCATION = {Type.NORMAL: 0.9, Type.ELECTRIC: 0.1}
+OFF_PEAK_ALLOCATION = {Type.NORMAL: 0.8, Type.ELECTRIC: 0.2}
+
+
+class AllocationSchedule:
+    """
+    Target spot allocation over time as an ordered table of transitions repeating every `period`
+    minutes. Each allocation holds from its transition until the next, wrapping around the period,
+    so the model only has to act at the transition minutes.
+    """
+
+    def __init__(self, transitions, period=1440):
+        transitions = sorted(transitions, key=lambda transition: transition.minute)
+        if not transitions:
+            raise ValueError("An allocation schedule needs at least one transition")
+        if transitions[0].minute < 0 or transitions[-1].minute >= period:
+            raise ValueError(f"Transition minutes must be within the period of {period} minutes")
+
+        self.period = period
+        self.minutes = [transition.minute for transition in transitions]
+        self.allocations = [transition.allocation for transition in transitions]
+
+    def allocation_at(self, minute):
+        # Before the first transition of a period, the last one of the previous period still holds
+        return self.allocations[bisect_right(self.minutes, minute % self.period) - 1]
+
+    def next_change(self, minute):
+        # First transition minute after `minute`
+        period_start = minute - minute % self.period
+        index = bisect_right(self.minutes, minute % self.period)
+        if index < len(self.minutes):
+            return period_start + self.minutes[index]
+        return period_start + self.period + self.minutes[0]
+
+
+def peak_hours_schedule(peak_hour_start, peak_hour_end, peak_allocation=PEAK_ALLOCATION,
+                        off_peak_allocation=OFF_PEAK_ALLOCATION):
+    return AllocationSchedule([
+        Transition(0, off_peak_allocation),
+        Transition(peak_hour_start * 60, peak_allocation),
+        Transition(peak_hour_end * 60, off_peak_allocation),
+    ])
+
+
+def weekly_schedule(weekday_transitions, weekend_transitions, weekend_days=(5, 6)):
+    """One day's transitions on weekdays and another's on weekend days, days 0-6 starting at minute 0."""
+    transitions = []
+    for day in range(7):
+        day_transitions = weekend_transitions if day in weekend_days else weekday_transitions
+        transitions += [Transition(day * 1440 + transition.minute, transition.allocation)
+                        for transition in day_transitions]
+    return AllocationSchedule(transitions, period=7 * 1440)
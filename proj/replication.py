@@ -0,0 +1,150 @@
+import math
+from collections import namedtuple
+
+from pipeline import analyze_data, configurations, simulation_parameters
+from sweep import SweepTask, run_sweep, task_seed
+
+# Outcome of replicating one configuration: metric -> mean / confidence-interval half-width
+ReplicationResult = namedtuple("ReplicationResult", ["means", "half_widths", "replications", "converged"])
+
+
+def t_central_probability(t, degrees_of_freedom):
+    """P(|T| < t) for a Student-t with integer degrees of freedom, in closed form (A&S 26.7.3-4)."""
+    v = degrees_of_freedom
+    theta = math.atan(t / math.sqrt(v))
+    cos_squared = math.cos(theta) ** 2
+    if v % 2:
+        term, total = math.cos(theta), 0.0
+        for j in range(1, (v - 1) // 2 + 1):
+            total += term
+            term *= 2 * j / (2 * j + 1) * cos_squared
+        return 2 / math.pi * (theta + math.sin(theta) * total)
+    term, total = 1.0, 0.0
+    for j in range(1, v // 2 + 1):
+        total += term
+        term *= (2 * j - 1) / (2 * j) * cos_squared
+    return math.sin(theta) * total
+
+
+def t_quantile(probability, degrees_of_freedom):
+    """Student-t quantile, found by bisection on the exact distribution function."""
+    if probability < 0.5:
+        return -t_quantile(1 - probability, degrees_of_freedom)
+    central = 2 * probability - 1
+    low, high = 0.0, 1.0
+    while t_central_probability(high, degrees_of_freedom) < central:
+        low, high = high, 2 * high
+    for _ in range(100):
+        middle = (low + high) / 2
+        if t_central_probability(middle, degrees_of_freedom) < central:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class RunningStats:
+    """Streaming mean and variance (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def half_width(self, confidence=0.95):
+        if self.count < 2:
+            return math.inf
+        quantile = t_quantile(1 - (1 - confidence) / 2, self.count - 1)
+        return quantile * math.sqrt(self.variance() / self.count)
+
+
+def run_replications(configurations, parameters, half_width, confidence=0.95, batch_size=4,
+                     min_replications=3, max_replications=50, seed=0, workers=None,
+                     common_random_numbers=False, relative=False):
+    """
+    Replicate every configuration in batches until each analyze_data metric's confidence-interval
+    half-width is below `half_width` (a number, or a dict of metric -> threshold), or until
+    max_replications is reached. With relative=True the half-widths are taken as a fraction of each
+    metric's mean, so one threshold (e.g. 0.05 for ±5%) suits earnings and availability shares alike.
+
+    Returns one ReplicationResult per configuration, in the order of `configurations`.
+    """
+    stats = [{} for _ in configurations]
+    done = [False] * len(configurations)
+
+    def threshold(metric):
+        return half_width.get(metric, math.inf) if isinstance(half_width, dict) else half_width
+
+    def width(stat):
+        half = stat.half_width(confidence)
+        if not relative:
+            return half
+        # A metric that is zero in every replication has nothing left to estimate
+        if stat.mean == 0:
+            return 0.0 if half == 0 else math.inf
+        return half / abs(stat.mean)
+
+    def converged(config_stats):
+        return all(width(stat) <= threshold(metric) for metric, stat in config_stats.items())
+
+    replications = [0] * len(configurations)
+    while not all(done):
+        tasks = []
+        for config_index, configuration in enumerate(configurations):
+            if done[config_index]:
+                continue
+            config_title, mode, normal_chance, electric_chance, premium_chance = configuration
+            count = max(batch_size, min_replications - replications[config_index])
+            count = min(count, max_replications - replications[config_index])
+            for replication in range(replications[config_index], replications[config_index] + count):
+                # The task index points back at the configuration
+                tasks.append(SweepTask(config_index, config_title, mode, normal_chance, electric_chance,
+                                       premium_chance, replication,
+                                       task_seed(seed, config_index, replication, common_random_numbers),
+                                       dict(parameters, common_random_numbers=common_random_numbers)))
+            replications[config_index] += count
+
+        for task, result, error in run_sweep(tasks, workers):
+            if error is not None:
+                print(f"Replication {task.replication} of {task.config_title} ({task.mode.value}) failed: {error!r}")
+                continue
+            df, wait_time_df = result
+            summary = analyze_data(df, wait_time_df, task.premium_chance != 0)
+            for metric, value in summary.items():
+                stats[task.index].setdefault(metric, RunningStats()).add(float(value))
+
+        for config_index in range(len(configurations)):
+            if done[config_index]:
+                continue
+            enough = replications[config_index] >= min_replications and converged(stats[config_index])
+            done[config_index] = enough or replications[config_index] >= max_replications
+
+    return [
+        ReplicationResult(
+            means={metric: stat.mean for metric, stat in config_stats.items()},
+            half_widths={metric: stat.half_width(confidence) for metric, stat in config_stats.items()},
+            replications=max((stat.count for stat in config_stats.values()), default=0),
+            converged=bool(config_stats) and converged(config_stats),
+        )
+        for config_stats in stats
+    ]
+
+
+def run_replicated_pipeline(half_width, **kwargs):
+    results = run_replications(configurations, simulation_parameters, half_width, **kwargs)
+    for (config_title, mode, normal_chance, electric_chance, premium_chance), result in zip(configurations, results):
+        title = f"{mode.value} - Normal: {normal_chance}, Electric: {electric_chance}, Premium: {premium_chance}"
+        status = "converged" if result.converged else "replication cap reached"
+        print(f"\nSummary for {title} ({result.replications} replications, {status})")
+        for metric, mean in result.means.items():
+            print(f"{metric}: {round(mean, 2)} ± {round(result.half_widths[metric], 2)}")
+    return results
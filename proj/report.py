@@ -0,0 +1,192 @@
+"""
+Headless figures for a sweep. Each run's series are reduced once in the parent (rolling medians,
+then min/max decimation down to about one point pair per pixel column), and the figures are drawn
+in worker processes straight onto Agg canvases and written to files. Pyplot is never involved, so
+reporting needs no display and leaves the importing process's matplotlib backend alone.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Roughly the width in pixels of one plot at the figures' size and dpi
+PIXEL_COLUMNS = 600
+DPI = 100
+
+# Series plotted as they are, and the rolling medians plotted next to them: name -> (column, window)
+SERIES = ["earnings", "parked_cars", "waiting_cars", "total_common_spots", "total_electric_spots",
+          "total_premium_spots"]
+ROLLING_MEDIANS = {
+    "parked_cars_median": ("parked_cars", 20),
+    "waiting_cars_median": ("waiting_cars", 20),
+    "common_cars_parked_median": ("total_common_cars_parked", 30),
+    "electric_cars_parked_median": ("total_electric_cars_parked", 20),
+    "premium_cars_parked_median": ("total_premium_cars_parked", 20),
+}
+
+
+def decimate(x, y, columns=PIXEL_COLUMNS):
+    """
+    Keep the minimum and maximum of y in each of `columns` equal slices, in their original order.
+    Drawn as a line this looks the same as the full series at that width, peaks included.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    x = np.asarray(x)
+    if len(y) <= 2 * columns:
+        return x, y
+
+    size = -(-len(y) // columns)
+    columns = -(-len(y) // size)
+    blocks = np.full(size * columns, np.nan)
+    blocks[:len(y)] = y
+    blocks = blocks.reshape(columns, size)
+
+    # Rolling medians start with NaNs; ignore them, and a block of only NaNs keeps its first one
+    missing = np.isnan(blocks)
+    offsets = np.arange(columns) * size
+    lows = np.argmin(np.where(missing, np.inf, blocks), axis=1)
+    highs = np.argmax(np.where(missing, -np.inf, blocks), axis=1)
+    index = np.unique(np.concatenate([offsets + lows, offsets + highs]))
+    return x[index], y[index]
+
+
+def run_series(df, columns=PIXEL_COLUMNS):
+    """Everything the figures draw from one run, skipping the first hour, as decimated (x, y) pairs."""
+    df = df[df["time"] >= 60]
+    hours = (df["time"] / 60).to_numpy()
+
+    series = {name: decimate(hours, df[name], columns) for name in SERIES}
+    for name, (column, window) in ROLLING_MEDIANS.items():
+        series[name] = decimate(hours, df[column].rolling(window=window).median(), columns)
+    series["final_earnings"] = df["earnings"].iloc[-1]
+    series["spots_change"] = df["total_common_spots"].nunique() > 1
+    return series
+
+
+def render_model_figure(path, model_title, results, include_total_spots):
+    # results: (summary, series, electric_chance, premium_chance, title) per configuration
+    n_cols = 3 + int(include_total_spots)
+    n_configs = len(results)
+    fig = Figure(figsize=(6 * n_cols, 6 * n_configs))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(n_configs, n_cols)
+    fig.suptitle(f"Results for {model_title}", fontsize=12)
+    if n_configs == 1:
+        axes = [axes]  # Ensure axes is iterable for a single configuration
+
+    for idx, (summary, series, electric_chance, premium_chance, title) in enumerate(results):
+        summary_text = "\n".join([f"{key}: {value}" for key, value in summary.items()])
+
+        # Summary Text
+        axes[idx][0].axis("off")
+        axes[idx][0].text(0.5, 0.5, summary_text, fontsize=8, ha="center", va="center")
+        axes[idx][0].set_title(f"Summary: {title}", fontsize=10)
+
+        # Earnings Over Time
+        axes[idx][1].plot(*series["earnings"], label="Earnings")
+        if idx == 0:
+            axes[idx][1].set_title("Earnings Over Time", fontsize=10)
+        axes[idx][1].set_xlabel("Hour of the Day", fontsize=8)
+        axes[idx][1].set_ylabel("Earnings (€)", fontsize=8)
+        axes[idx][1].legend(fontsize=8)
+        axes[idx][1].grid(True)
+
+        # Cars Parked and Waiting Over Time
+        axes[idx][2].plot(*series["parked_cars"], label="Parked Cars")
+        axes[idx][2].plot(*series["waiting_cars"], label="Waiting Cars")
+        axes[idx][2].plot(*series["parked_cars_median"], label="Rolling Median (Parked Cars)", linestyle="--")
+        axes[idx][2].plot(*series["waiting_cars_median"], label="Rolling Median (Waiting Cars)", linestyle="--")
+        if idx == 0:
+            axes[idx][2].set_title("Cars Parked and Waiting Over Time", fontsize=10)
+        axes[idx][2].set_xlabel("Hour of the Day", fontsize=8)
+        axes[idx][2].set_ylabel("Number of Cars", fontsize=8)
+        axes[idx][2].legend(fontsize=8)
+        axes[idx][2].grid(True)
+
+        # Total Parking Spots Over Time
+        if include_total_spots and series["spots_change"]:
+            axes[idx][3].plot(*series["total_common_spots"], label="Total Common Spots")
+            if electric_chance > 0:
+                axes[idx][3].plot(*series["total_electric_spots"], label="Total Electric Spots")
+            if premium_chance > 0:
+                axes[idx][3].plot(*series["total_premium_spots"], label="Total Premium Spots")
+            if idx == 0:
+                axes[idx][3].set_title("Total Parking Spots Over Time", fontsize=10)
+            axes[idx][3].set_xlabel("Hour of the Day", fontsize=8)
+            axes[idx][3].set_ylabel("Total Spots", fontsize=8)
+            axes[idx][3].legend(fontsize=8)
+            axes[idx][3].grid(True)
+
+    fig.subplots_adjust(wspace=0.4, hspace=0.6)
+    fig.tight_layout(rect=(0, 0, 1, 0.96))
+    fig.savefig(path, dpi=DPI)
+    return path
+
+
+def render_combined_figure(path, combined_data):
+    # combined_data: config title -> (series, model_title) per model
+    n_configs = len(combined_data)
+    fig = Figure(figsize=(14, 6 * n_configs))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(2 * n_configs, 2)
+
+    if n_configs == 1:
+        axes = [axes]
+
+    for idx, (config_title, model_results) in enumerate(combined_data.items()):
+        axes[idx * 2][0].axis("off")
+        axes[idx * 2][0].text(0.5, 0.5, config_title, fontsize=10, ha="center", va="center")
+
+        for series, model_title in model_results:
+            axes[idx * 2 + 1][0].plot(*series["common_cars_parked_median"], label=f"{model_title}")
+            axes[idx * 2 + 1][0].set_title("Common Cars Parked Over Time (Rolling Median)", fontsize=10)
+            axes[idx * 2 + 1][0].set_xlabel("Hour of the Day", fontsize=8)
+            axes[idx * 2 + 1][0].set_ylabel("Common Cars Parked", fontsize=8)
+            axes[idx * 2 + 1][0].legend(fontsize=8, loc='upper left', bbox_to_anchor=(1, 1))
+            axes[idx * 2 + 1][0].grid(True)
+
+            axes[idx * 2 + 1][1].plot(*series["electric_cars_parked_median"], label=f"{model_title}")
+            if model_title == "Membership":
+                axes[idx * 2 + 1][1].plot(*series["premium_cars_parked_median"], label=f"Membership - Premium")
+            axes[idx * 2 + 1][1].set_title("Electric Cars Parked Over Time (Rolling Median)", fontsize=10)
+            axes[idx * 2 + 1][1].set_xlabel("Hour of the Day", fontsize=8)
+            axes[idx * 2 + 1][1].set_ylabel("Cars Parked", fontsize=8)
+            axes[idx * 2 + 1][1].legend(fontsize=8, loc='upper left', bbox_to_anchor=(1, 1))
+            axes[idx * 2 + 1][1].grid(True)
+
+            total_earnings = series["final_earnings"] / 1000
+            axes[idx * 2][1].bar(model_title, total_earnings)
+            axes[idx * 2][1].set_title("Total Earnings per Mode", fontsize=10)
+            axes[idx * 2][1].set_xlabel("Modes", fontsize=8)
+            axes[idx * 2][1].set_ylabel("Total Earnings (K€)", fontsize=8)
+            axes[idx * 2][1].tick_params(axis='x', labelsize=8)
+            if model_title == "Time-based":
+                axes[idx * 2][1].set_ylim(bottom=total_earnings - 10)
+            axes[idx * 2][1].grid(True)
+    fig.tight_layout(rect=(0, 0, 0.85, 0.95))
+    fig.subplots_adjust(wspace=0.5, hspace=0.98, right=0.85)
+    fig.savefig(path, dpi=DPI)
+    return path
+
+
+def render_report(model_figures, combined_data, directory, workers=None):
+    """
+    Write one figure per mode and the cross-mode comparison to `directory`, each in its own worker
+    process, and return the file paths.
+
+    model_figures: (file name, model title, results, include_total_spots) per mode, with results as
+    taken by render_model_figure
+    combined_data: config title -> (series, model_title) per mode
+    """
+    os.makedirs(directory, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(render_model_figure, os.path.join(directory, f"{name}.png"), model_title, results,
+                            include_total_spots)
+            for name, model_title, results, include_total_spots in model_figures
+        ]
+        futures.append(executor.submit(render_combined_figure, os.path.join(directory, "combined.png"),
+                                       combined_data))
+        return [future.result() for future in futures]
@@ -1,7 +1,14 @@
+import copy
+import cProfile
 import time
 from enum import Enum
 import model
-import pandas as pd
+from events import EventEngine
+from aggregates import WaitTimeStats
+from checkpoint import restore_checkpoint, take_checkpoint
+from metrics import MetricsCollector
+from model import Backends
+from profiling import print_report
 
 
 class Modes(Enum):
@@ -11,10 +18,18 @@ class Modes(Enum):
     MEMBERSHIP = "Membership"
 
 
+class Engines(Enum):
+    STEP = "step"
+    EVENT = "event"
+
+
 class Simulation:
     def __init__(self, width, height, total_spots, electric_percentage=0.1, premium_percentage=0.1, electric_chance=0.1,
                  premium_chance=0, mode=Modes.ON_DEMAND, gui=False, max_queue_len=10, cars_added_per_step=1,
-                 peak_hour_start=8, peak_hour_end=18):
+                 peak_hour_start=8, peak_hour_end=18, engine=Engines.STEP, backend=Backends.MESA,
+                 seed=None, common_random_numbers=False, headless=False, metrics_sink=None,
+                 days=1, time_phases=False, profile_path=None, hourly_demand=None, poisson_arrivals=False,
+                 allocation_schedule=None, control_interval=15, policy=None, checkpoint=None):
         self.common_spots = int(total_spots * (1 - electric_percentage))
         self.electric_spots = int(total_spots * electric_percentage)
         self.premium_spots = 0
@@ -29,13 +44,58 @@ class Simulation:
         self.mode = None
         self.current_minutes = 0
         self.day_length = 1440  # 24 hours
+        self.horizon = self.day_length * days
         self.gui = gui
         self.max_queue_len = max_queue_len
         self.cars_added_per_step = cars_added_per_step
         self.peak_hour_start = peak_hour_start
         self.peak_hour_end = peak_hour_end
+        self.engine = engine
+        self.backend = backend
+        self.seed = seed
+        self.common_random_numbers = common_random_numbers
+        self.headless = headless
+        # Arrivals per minute for each of the 24 hours (None: cars_added_per_step with the peak-hour
+        # increase), and whether the count each minute is Poisson distributed around that rate
+        self.hourly_demand = hourly_demand
+        self.poisson_arrivals = poisson_arrivals
+        # Spot split over time for the time-based mode (see regimes.py); None uses the peak hours
+        self.allocation_schedule = allocation_schedule
+        # Minutes between spot rebalances in the on-demand mode
+        self.control_interval = control_interval
+        # Replaces the mode's spot preferences and admission rule (see policies.py)
+        self.policy = policy
+        # Where per-minute metrics go while running (see sinks.py); None keeps them in memory
+        self.metrics_sink = metrics_sink
+        # Per-phase wall times of the model (printed and kept in phase_report after a run), and
+        # where to dump cProfile stats of the whole run
+        self.time_phases = time_phases
+        self.phase_report = None
+        self.profile_path = profile_path
         self.set_mode(mode)
 
+        # Resume from a model state saved with checkpoint.take_checkpoint; the run then covers the
+        # `horizon` minutes after the checkpoint's minute
+        self.start_minute = 0
+        if checkpoint is not None:
+            self.resume(checkpoint)
+
+    def resume(self, checkpoint):
+        restore_checkpoint(self.model, checkpoint)
+        self.start_minute = self.current_minutes = self.model.current_minutes
+
+    def fork(self, mode, metrics_sink=None):
+        """
+        A simulation with the same parameters in another mode, starting from this one's current state
+        (spots, parked and queued cars, clock and future arrivals) instead of from an empty lot.
+        """
+        forked = copy.copy(self)
+        forked.metrics_sink = metrics_sink
+        forked.phase_report = None
+        forked.set_mode(mode)
+        forked.resume(take_checkpoint(self.model))
+        return forked
+
 
     def set_mode(self, mode):
         self.mode = mode
@@ -45,21 +105,27 @@ class Simulation:
             self.model = model.PriorityModel(self.height, self.width, self.common_spots, self.electric_spots,
                                              self.premium_spots, self.electric_chance, self.premium_chance,
                                              self.max_queue_len, self.cars_added_per_step,
-                                             self.peak_hour_start, self.peak_hour_end)
+                                             self.peak_hour_start, self.peak_hour_end, self.backend,
+                                             self.seed, self.common_random_numbers, self.headless,
+                                             self.hourly_demand, self.poisson_arrivals, self.policy)
 
         elif self.mode == Modes.ON_DEMAND:
             self.model = model.OnDemandModel(self.height, self.width, self.common_spots, self.electric_spots,
                                              self.premium_spots, self.electric_chance, self.premium_chance,
                                              self.max_queue_len, self.cars_added_per_step,
-                                             self.peak_hour_start, self.peak_hour_end)
-
-            self.model.update_parking_spots()
+                                             self.peak_hour_start, self.peak_hour_end, self.backend,
+                                             self.seed, self.common_random_numbers, self.headless,
+                                             self.hourly_demand, self.poisson_arrivals, self.policy,
+                                             control_interval=self.control_interval)
 
         elif self.mode == Modes.TIME_BASED:
             self.model = model.TimeBasedModel(self.height, self.width, self.common_spots, self.electric_spots,
                                               self.premium_spots, self.electric_chance, self.premium_chance,
                                               self.max_queue_len, self.cars_added_per_step,
-                                             self.peak_hour_start, self.peak_hour_end)
+                                             self.peak_hour_start, self.peak_hour_end, self.backend,
+                                             self.seed, self.common_random_numbers, self.headless,
+                                             self.hourly_demand, self.poisson_arrivals, self.policy,
+                                              allocation_schedule=self.allocation_schedule)
 
 
         elif self.mode == Modes.MEMBERSHIP:
@@ -69,99 +135,73 @@ class Simulation:
             self.model = model.MembershipModel(self.height, self.width, self.common_spots, self.electric_spots,
                                                self.premium_spots, self.electric_chance, self.premium_chance,
                                                self.max_queue_len, self.cars_added_per_step,
-                                             self.peak_hour_start, self.peak_hour_end)
+                                             self.peak_hour_start, self.peak_hour_end, self.backend,
+                                             self.seed, self.common_random_numbers, self.headless,
+                                             self.hourly_demand, self.poisson_arrivals, self.policy)
 
     def run_simulation(self):
-        simulation_data = {
-            "time": [],
-            "parked_cars": [],
-            "waiting_cars": [],
-            "total_cars_parked": [],
-            "available_electric_spots": [],
-            "available_premium_spots": [],
-            "available_common_spots": [],
-            "total_electric_spots": [],
-            "total_premium_spots": [],
-            "total_common_spots": [],
-            "earnings": [],
-            "total_common_cars_parked": [],
-            "total_electric_cars_parked": [],
-            "total_premium_cars_parked": [],
-        }
-
-        while self.current_minutes < self.day_length:
-            self.current_minutes += 1
-            self.model.step()
-
-            if self.gui:
-                time.sleep(0.1)
-
-            spots = [agent for agent in self.model.schedule.agents if isinstance(agent, model.Spot)]
-            parked_cars = sum(agent.parked for agent in self.model.schedule.agents if isinstance(agent, model.Car))
-
-            simulation_data["time"].append(self.current_minutes)
-            simulation_data["parked_cars"].append(parked_cars)
-            simulation_data["waiting_cars"].append(len(self.model.queue))
-            simulation_data["total_cars_parked"].append(parked_cars + len(self.model.graveyard))
-            simulation_data["available_electric_spots"].append(
-                sum(spot.available and spot.spot_type == model.Type.ELECTRIC for spot in spots))
-            simulation_data["available_premium_spots"].append(
-                sum(spot.available and spot.spot_type == model.Type.PREMIUM for spot in spots))
-            simulation_data["available_common_spots"].append(
-                sum(spot.available and spot.spot_type == model.Type.NORMAL for spot in spots))
-            simulation_data["total_electric_spots"].append(self.model.electric_spots)
-            simulation_data["total_premium_spots"].append(self.model.premium_spots)
-            simulation_data["total_common_spots"].append(self.model.common_spots)
-            simulation_data["earnings"].append(self.model.earnings)
-            simulation_data["total_common_cars_parked"].append(
-                sum(car.parked and car.car_type == model.Type.NORMAL for car in self.model.schedule.agents if
-                    isinstance(car, model.Car)))
-            simulation_data["total_electric_cars_parked"].append(
-                sum(car.parked and car.car_type == model.Type.ELECTRIC for car in self.model.schedule.agents if
-                    isinstance(car, model.Car)))
-            simulation_data["total_premium_cars_parked"].append(
-                sum(car.parked and car.car_type == model.Type.PREMIUM for car in self.model.schedule.agents if
-                    isinstance(car, model.Car)))
-
-            if self.current_minutes % 15 == 0:
-                print(f"Current time: {(self.current_minutes // 60) % 24}:{self.current_minutes % 60}")
-
-        total_waiting_time = 0
-        total_cars = 0
-        total_waiting_time_by_type = {
-            model.Type.NORMAL: 0,
-            model.Type.ELECTRIC: 0,
-            model.Type.PREMIUM: 0
-        }
-        total_cars_by_type = {
-            model.Type.NORMAL: 0,
-            model.Type.ELECTRIC: 0,
-            model.Type.PREMIUM: 0
-        }
-
-        for car in self.model.graveyard:
-            if isinstance(car, model.Car):
-                total_waiting_time += car.waiting_time
-                total_cars += 1
-                total_waiting_time_by_type[car.car_type] += car.waiting_time
-                total_cars_by_type[car.car_type] += 1
-        total_average_waiting_time = 0
-        if total_cars > 0:
-            total_average_waiting_time = total_waiting_time / total_cars
-
-        average_waiting_time_by_type = {
-            car_type: (total_waiting_time_by_type[car_type] / total_cars_by_type[car_type] if total_cars_by_type[
-                                                                                                  car_type] > 0 else 0)
-            for car_type in total_waiting_time_by_type
-        }
-
-        average_waiting_time_df = {
-            "total": total_average_waiting_time,
-            model.Type.NORMAL.value: average_waiting_time_by_type[model.Type.NORMAL],
-            model.Type.ELECTRIC.value: average_waiting_time_by_type[model.Type.ELECTRIC],
-            model.Type.PREMIUM.value: average_waiting_time_by_type[model.Type.PREMIUM]
-        }
+        if self.time_phases and self.model.phase_timers is None:
+            self.model.enable_phase_timers()
 
-        print("Simulation complete.")
-        return pd.DataFrame(simulation_data), average_waiting_time_df
+        if self.profile_path is None:
+            result = self.run()
+        else:
+            profiler = cProfile.Profile()
+            result = profiler.runcall(self.run)
+            profiler.dump_stats(self.profile_path)
+
+        if self.model.phase_timers is not None:
+            self.phase_report = self.model.phase_timers.report()
+            print_report(self.phase_report)
+        return result
+
+    def run(self):
+        metrics = MetricsCollector(self.horizon, self.metrics_sink, start_minute=self.start_minute)
+        metrics.start(self.model)
+        end_minute = self.start_minute + self.horizon
+
+        if self.engine == Engines.EVENT:
+            EventEngine(self.model).run(end_minute, lambda minute: self.record_minute(metrics, minute))
+            self.current_minutes = end_minute
+        else:
+            while self.current_minutes < end_minute:
+                self.current_minutes += 1
+                self.model.step()
 
+                if self.gui:
+                    time.sleep(0.1)
+
+                self.record_minute(metrics, self.current_minutes)
+
+        # The event engine only records minutes where something happened; the collector fills the gaps.
+        # With a metrics sink this returns a lazy reader over the written chunks instead of a DataFrame
+        return metrics.to_dataframe(), self.waiting_time_summary()
+
+    def record_minute(self, metrics, minute):
+        metrics.record(minute, self.model)
+
+        if minute % 15 == 0:
+            day = f"Day {minute // self.day_length + 1} " if self.horizon > self.day_length else ""
+            print(f"Current time: {day}{(minute // 60) % 24}:{minute % 60}")
+
+    def waiting_time_summary(self):
+        average_waiting_time_df = summarize_wait_times(self.model.wait_time_stats)
+
+        print("Simulation complete.")
+        return average_waiting_time_df
+
+
+def summarize_wait_times(stats_by_type):
+    overall = WaitTimeStats()
+    for stats in stats_by_type.values():
+        overall.merge(stats)
+
+    return {
+        "total": overall.mean(),
+        model.Type.NORMAL.value: stats_by_type[model.Type.NORMAL].mean(),
+        model.Type.ELECTRIC.value: stats_by_type[model.Type.ELECTRIC].mean(),
+        model.Type.PREMIUM.value: stats_by_type[model.Type.PREMIUM].mean(),
+        "p50": overall.quantile(0.5),
+        "p95": overall.quantile(0.95),
+        "p99": overall.quantile(0.99),
+    }
@@ -0,0 +1,157 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from metrics import COLUMNS
+
+
+class MetricsReader:
+    """
+    Lazy view of metrics written by a sink. Indexing by column name loads only that column, as a
+    pandas Series, so pipeline.analyze_data can read it like a DataFrame. Any other indexing (e.g. a
+    boolean mask, as in the plotting functions) loads the full table first.
+    """
+
+    columns = COLUMNS
+
+    def column(self, name):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def iter_chunks(self):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        return self.to_dataframe()[key]
+
+    def __len__(self):
+        return len(self.column("time"))
+
+    def to_dataframe(self):
+        return pd.DataFrame({name: self.column(name) for name in self.columns})
+
+
+class BinarySink:
+    """
+    One raw little-endian int64 file per column, appended chunk by chunk. The reader memory-maps
+    the files, so columns are paged in from disk only when used.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.files = {name: open(os.path.join(directory, f"{name}.bin"), "wb") for name in COLUMNS}
+        self.rows = 0
+
+    def write_chunk(self, columns):
+        for name, values in columns.items():
+            self.files[name].write(values.astype("<i8").tobytes())
+            # Keep what is written on disk even if the run dies later
+            self.files[name].flush()
+        self.rows += len(columns["time"])
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        with open(os.path.join(self.directory, "metadata.json"), "w") as file:
+            json.dump({"rows": self.rows, "columns": COLUMNS, "dtype": "<i8"}, file)
+        return BinaryReader(self.directory)
+
+
+class BinaryReader(MetricsReader):
+    def __init__(self, directory, chunk_size=1440):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        with open(os.path.join(directory, "metadata.json")) as file:
+            self.rows = json.load(file)["rows"]
+
+    def array(self, name):
+        if self.rows == 0:
+            return np.zeros(0, dtype="<i8")
+        return np.memmap(os.path.join(self.directory, f"{name}.bin"), dtype="<i8", mode="r", shape=(self.rows,))
+
+    def column(self, name):
+        return pd.Series(self.array(name), name=name, copy=False)
+
+    def iter_chunks(self):
+        arrays = {name: self.array(name) for name in self.columns}
+        for start in range(0, self.rows, self.chunk_size):
+            yield pd.DataFrame({name: np.asarray(values[start:start + self.chunk_size])
+                                for name, values in arrays.items()})
+
+    def __len__(self):
+        return self.rows
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write_chunk(self, columns):
+        pd.DataFrame(columns).to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            pd.DataFrame(columns=COLUMNS).to_csv(self.path, index=False)
+        return CsvReader(self.path)
+
+
+class CsvReader(MetricsReader):
+    def __init__(self, path, chunk_size=1440):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def column(self, name):
+        return pd.read_csv(self.path, usecols=[name])[name]
+
+    def iter_chunks(self):
+        yield from pd.read_csv(self.path, chunksize=self.chunk_size)
+
+
+class ParquetSink:
+    """Every chunk becomes a row group of one Parquet file. Needs the optional pyarrow package."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("ParquetSink needs pyarrow (pip install pyarrow)") from error
+
+        self.path = path
+        self.pa = pa
+        schema = pa.schema([(name, pa.int64()) for name in COLUMNS])
+        self.writer = pq.ParquetWriter(path, schema)
+
+    def write_chunk(self, columns):
+        self.writer.write_table(self.pa.table({name: columns[name] for name in COLUMNS}))
+
+    def close(self):
+        self.writer.close()
+        return ParquetReader(self.path)
+
+
+class ParquetReader(MetricsReader):
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def file(self):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(self.path)
+
+    def column(self, name):
+        return self.file.read(columns=[name]).column(name).to_pandas().rename(name)
+
+    def iter_chunks(self):
+        for index in range(self.file.num_row_groups):
+            yield self.file.read_row_group(index).to_pandas()
+
+    def __len__(self):
+        return self.file.metadata.num_rows
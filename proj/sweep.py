@@ -0,0 +1,99 @@
+import contextlib
+import io
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from simulation import Simulation
+
+# One independent simulation run of a sweep
+SweepTask = namedtuple("SweepTask", [
+    "index", "config_title", "mode", "normal_chance", "electric_chance", "premium_chance",
+    "replication", "seed", "parameters",
+])
+
+
+def task_seed(seed, config_index, replication, common_random_numbers=False):
+    # Depends only on the run's position, so extra replications can be added later without reseeding
+    key = [seed, replication] if common_random_numbers else [seed, config_index, replication]
+    return int(np.random.SeedSequence(key).generate_state(1)[0])
+
+
+def build_tasks(configurations, parameters, replications=1, seed=0, common_random_numbers=False,
+                first_replication=0):
+    """
+    Expand (config_title, mode, normal_chance, electric_chance, premium_chance) entries into one task
+    per replication, each with its own deterministic seed derived from `seed`. Task indexes follow the
+    order of `configurations`, one per configuration and replication.
+
+    With common_random_numbers, every configuration of a replication shares the same seed and the
+    models draw the same arrivals and parking times, so differences between policies are not noise.
+    """
+    parameters = dict(parameters, common_random_numbers=common_random_numbers)
+
+    tasks = []
+    for config_index, configuration in enumerate(configurations):
+        config_title, mode, normal_chance, electric_chance, premium_chance = configuration
+        for replication in range(first_replication, first_replication + replications):
+            seed_for_run = task_seed(seed, config_index, replication, common_random_numbers)
+            tasks.append(SweepTask(len(tasks), config_title, mode, normal_chance, electric_chance,
+                                   premium_chance, replication, seed_for_run, parameters))
+    return tasks
+
+
+def run_task(task):
+    random.seed(task.seed)
+    np.random.seed(task.seed)
+
+    parameters = dict(task.parameters)
+    # One cProfile dump per run when profiling a sweep
+    profile_dir = parameters.pop("profile_dir", None)
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+        name = f"{task.mode.name.lower()}-{task.config_title.replace(' ', '_').lower()}-{task.replication}.prof"
+        parameters["profile_path"] = os.path.join(profile_dir, name)
+
+    # Keep the per-run progress output of Simulation out of the sweep's console, where the
+    # workers' lines would interleave
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation = Simulation(
+            electric_percentage=task.electric_chance,
+            premium_percentage=task.premium_chance,
+            electric_chance=task.electric_chance,
+            premium_chance=task.premium_chance,
+            mode=task.mode,
+            seed=task.seed,
+            **parameters
+        )
+        return simulation.run_simulation()
+
+
+def run_sweep(tasks, workers=None):
+    """
+    Run tasks in a process pool and yield (task, result, error) as each run finishes.
+    result is the (df, wait_time_df) pair of run_simulation, or None if the run failed with error.
+    """
+    crashed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_task, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                yield task, future.result(), None
+            except BrokenProcessPool:
+                crashed.append(task)
+            except Exception as error:
+                yield task, None, error
+
+    # A worker that dies takes the whole pool with it, so rerun the unfinished tasks in their
+    # own process to find out which one crashed
+    for task in sorted(crashed):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                yield task, executor.submit(run_task, task).result(), None
+            except Exception as error:
+                yield task, None, error
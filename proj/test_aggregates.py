@@ -0,0 +1,59 @@
+import math
+import statistics
+
+import numpy as np
+import pytest
+
+from aggregates import QuantileSketch, WaitTimeStats
+
+QUANTILES = [0, 0.1, 0.5, 0.9, 0.95, 0.99, 1]
+
+
+def exact_quantile(values, q):
+    # The sketch returns the value at rank floor(q * (n - 1)) of the sorted values
+    return sorted(values)[math.floor(q * (len(values) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(12).lognormal(2, 1, 20000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in QUANTILES:
+        assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=0.01)
+
+
+def test_merged_sketches_match_one_sketch():
+    values = np.random.default_rng(12).exponential(10, 5000)
+    whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for index, value in enumerate(values):
+        whole.add(value)
+        (first if index % 2 else second).add(value)
+    first.merge(second)
+
+    assert first.count == whole.count
+    assert [first.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+
+
+def test_zeros_and_bucket_limit():
+    sketch = QuantileSketch(max_buckets=16)
+    sketch.add(0, count=50)
+    for value in range(1, 1001):
+        sketch.add(value)
+
+    assert len(sketch.buckets) <= 16
+    assert sketch.quantile(0.01) == 0.0
+    # Folding only merges the lowest buckets, so the top keeps its accuracy
+    assert sketch.quantile(1) == pytest.approx(1000, rel=0.01)
+
+
+def test_wait_time_stats():
+    waits = [0, 1, 2, 2, 3, 5, 8, 13]
+    stats = WaitTimeStats()
+    for wait in waits:
+        stats.add(wait)
+
+    assert stats.mean() == pytest.approx(statistics.fmean(waits))
+    assert stats.std() == pytest.approx(statistics.stdev(waits))
+    assert stats.quantile(0.5) == pytest.approx(exact_quantile(waits, 0.5), rel=0.01)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from arrivals import ArrivalGenerator, MINUTES_PER_DAY, peak_hour_curve
+
+# Busy mornings, nothing at night, and a quiet hour at noon
+DEMAND = [0] * 6 + [1.5] * 5 + [0] + [0.7] * 6 + [0] * 6
+
+
+def make_generator(chunk_minutes=MINUTES_PER_DAY, seed=16):
+    count_seed, type_seed, dwell_seed = np.random.SeedSequence(seed).spawn(3)
+    return ArrivalGenerator(DEMAND, [0.7, 0.2, 0.1], np.random.default_rng(count_seed),
+                            np.random.default_rng(type_seed), np.random.default_rng(dwell_seed), poisson=True,
+                            chunk_minutes=chunk_minutes)
+
+
+def test_arrivals_do_not_depend_on_the_chunk_size():
+    whole, chunked = make_generator(), make_generator(chunk_minutes=97)
+    for minute in range(2 * MINUTES_PER_DAY):
+        whole_types, whole_dwells = whole.at(minute)
+        chunked_types, chunked_dwells = chunked.at(minute)
+        assert list(chunked_types) == list(whole_types)
+        assert list(chunked_dwells) == list(whole_dwells)
+
+
+@pytest.mark.parametrize("chunk_minutes", [MINUTES_PER_DAY, 97])
+def test_next_arrival_skips_only_empty_minutes(chunk_minutes):
+    generator = make_generator(chunk_minutes)
+    minute = 0
+    while minute < 2 * MINUTES_PER_DAY:
+        generator.span(minute)
+        chunk_end = generator.end
+        next_minute = generator.next_arrival(minute)
+        assert next_minute >= minute
+        assert all(generator.count_at(skipped) == 0 for skipped in range(minute, next_minute))
+        # Either arrivals, or the end of the drawn chunk
+        assert next_minute == chunk_end or generator.count_at(next_minute) > 0
+        minute = next_minute + 1
+
+
+def test_discarded_minutes_are_an_error():
+    generator = make_generator(chunk_minutes=60)
+    generator.span(200)
+    with pytest.raises(ValueError):
+        generator.span(100)
+
+
+def test_demand_needs_24_non_negative_rates():
+    with pytest.raises(ValueError):
+        ArrivalGenerator([1] * 23, [1, 0, 0], np.random.default_rng(), np.random.default_rng())
+    with pytest.raises(ValueError):
+        ArrivalGenerator([-1] + [1] * 23, [1, 0, 0], np.random.default_rng(), np.random.default_rng())
+
+
+def test_peak_hour_curve():
+    rates = peak_hour_curve(4, 8, 18)
+    assert rates[:8] == [4] * 8 and rates[18:] == [4] * 6
+    assert max(rates) == rates[13] == 6
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import ResultCache
+
+
+def make_result(rows=50):
+    df = pd.DataFrame({
+        "time": np.arange(1, rows + 1),
+        "earnings": np.linspace(0, 100, rows),
+        "parked_cars": np.arange(rows) % 7,
+    })
+    return df, {"mean": 1.5, "p95": 4.0}
+
+
+def test_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    df, summary = make_result()
+    assert cache.get("key") is None
+
+    cache.put("key", (df, summary))
+    cached_df, cached_summary = cache.get("key")
+    pd.testing.assert_frame_equal(cached_df, df)
+    assert cached_summary == summary
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for key in ["a", "b", "c"]:
+        cache.put(key, make_result())
+    entry_size = os.path.getsize(cache.path("a"))
+
+    # Make "a" the oldest entry, then read it so that "b" becomes the least recently used
+    for age, key in [(30, "a"), (20, "b"), (10, "c")]:
+        os.utime(cache.path(key), (0, os.path.getmtime(cache.path(key)) - age))
+    assert cache.get("a") is not None
+
+    cache.max_bytes = 3 * entry_size
+    cache.put("d", make_result())
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ["a", "c", "d"])
+
+
+def test_broken_entry_is_a_miss_and_removed(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("key", make_result())
+    path = cache.path("key")
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) // 2)
+
+    assert cache.get("key") is None
+    assert not os.path.exists(path)
+
+    with open(path, "wb") as file:
+        file.write(b"not a zip file")
+    assert cache.get("key") is None
+    assert not os.path.exists(path)
@@ -0,0 +1,47 @@
+import pytest
+
+from agent import Type
+from checkpoint import take_checkpoint
+from model import Backends
+from simulation import Modes, Engines
+
+
+# The event engine does not support the NumPy backend
+@pytest.mark.parametrize("engine, backend", [(Engines.STEP, Backends.MESA), (Engines.EVENT, Backends.MESA),
+                                             (Engines.STEP, Backends.NUMPY)])
+@pytest.mark.parametrize("mode", list(Modes))
+def test_resume_matches_uninterrupted_run(make_simulation, run_for, mode, engine, backend):
+    full = make_simulation(mode, engine=engine, backend=backend, seed=1)
+    full_df, full_wait_time = run_for(full, 1440)
+
+    first_half = make_simulation(mode, engine=engine, backend=backend, seed=1)
+    run_for(first_half, 720)
+    resumed = make_simulation(mode, engine=engine, backend=backend, seed=1,
+                              checkpoint=take_checkpoint(first_half.model))
+    resumed_df, resumed_wait_time = run_for(resumed, 720)
+
+    assert resumed.model.earnings == full.model.earnings
+    assert resumed.model.departed_cars == full.model.departed_cars
+    assert resumed_wait_time == full_wait_time
+    assert resumed_df.equals(full_df.iloc[720:].reset_index(drop=True))
+
+
+def test_resumed_metrics_start_from_the_restored_state(make_simulation, run_for):
+    # No arrivals after 18:00, so the event engine has nothing to do for a long time after resuming
+    parameters = dict(engine=Engines.EVENT, seed=1, hourly_demand=[0] * 6 + [2] * 12 + [0] * 6)
+    first = make_simulation(Modes.PRIORITY, **parameters)
+    run_for(first, 1200)
+    resumed = make_simulation(Modes.PRIORITY, checkpoint=take_checkpoint(first.model), **parameters)
+    df, _ = run_for(resumed, 240)
+
+    assert list(df["time"]) == list(range(1201, 1441))
+    assert (df["earnings"] == first.model.earnings).all()
+    assert (df["available_common_spots"] == first.model.count_free_spots(Type.NORMAL)).all()
+
+
+def test_fork_keeps_the_model_clock(make_simulation, run_for):
+    simulation = make_simulation(Modes.PRIORITY, seed=1)
+    run_for(simulation, 600)
+    forked = simulation.fork(Modes.ON_DEMAND)
+    df, _ = run_for(forked, 840)
+    assert df["time"].iloc[0] == 601 and df["time"].iloc[-1] == 1440
@@ -0,0 +1,21 @@
+from agent import Type
+from city import Lot, route_overflow
+from simulation import Modes
+
+
+def test_overflow_only_goes_to_lots_that_park_the_car_type():
+    lots = [Lot("A", Modes.MEMBERSHIP, {}, ["B", "C"]), Lot("B", Modes.PRIORITY, {}, ["A"]),
+            Lot("C", Modes.MEMBERSHIP, {}, ["A"])]
+    overflow = {"A": [(5, Type.PREMIUM), (5, Type.PREMIUM), (5, Type.NORMAL)], "B": [], "C": []}
+    accepts = {"A": set(Type), "B": {Type.NORMAL, Type.ELECTRIC}, "C": set(Type)}
+    redirects, lost = route_overflow(lots, overflow, {"A": 0, "B": 5, "C": 1}, accepts)
+    assert redirects == {"C": [(5, Type.PREMIUM)], "B": [(5, Type.NORMAL)]}
+    assert lost == {"A": 1}
+
+
+def test_cars_a_lot_cannot_park_are_lost():
+    lots = [Lot("A", Modes.MEMBERSHIP, {}, ["B"]), Lot("B", Modes.PRIORITY, {}, ["A"])]
+    overflow = {"A": [(1, Type.PREMIUM)], "B": []}
+    redirects, lost = route_overflow(lots, overflow, {"A": 0, "B": 10}, {"A": set(Type), "B": {Type.NORMAL}})
+    assert redirects == {}
+    assert lost == {"A": 1}
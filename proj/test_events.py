@@ -0,0 +1,27 @@
+import pytest
+
+from simulation import Modes, Engines
+
+# Cars only arrive between 06:00 and 18:00
+DAYTIME_DEMAND = [0] * 6 + [2] * 12 + [0] * 6
+
+
+@pytest.mark.parametrize("mode", list(Modes))
+def test_event_engine_matches_step_engine(make_simulation, run_for, mode):
+    # Sampling parking times on arrival makes both engines see the same departures
+    results = []
+    for engine in Engines:
+        simulation = make_simulation(mode, engine=engine, seed=1, common_random_numbers=True,
+                                     hourly_demand=DAYTIME_DEMAND)
+        df, wait_time = run_for(simulation, 1440)
+        results.append((df["earnings"].iloc[-1], df["total_cars_parked"].iloc[-1], wait_time["total"]))
+    assert results[0] == results[1]
+
+
+def test_event_engine_skips_quiet_minutes(make_simulation, run_for):
+    simulation = make_simulation(Modes.PRIORITY, engine=Engines.EVENT, seed=1, hourly_demand=DAYTIME_DEMAND)
+    steps = []
+    step = simulation.model.step
+    simulation.model.step = lambda: (steps.append(None), step())
+    run_for(simulation, 1440)
+    assert len(steps) < 1000
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from agent import Type
+from model import SPOT_COUNTS, Backends
+from simulation import Modes
+
+
+def check_counters(model):
+    for spot_type in Type:
+        spots = [spot for spot in model.spots if spot.spot_type == spot_type]
+        assert set(model.spots_by_type[spot_type]) == set(spots)
+        assert set(model.free_spots[spot_type]) == {spot for spot in spots if spot.available}
+        assert set(model.taken_spots[spot_type]) == {spot for spot in spots if not spot.available}
+        assert getattr(model, SPOT_COUNTS[spot_type]) == len(spots)
+
+        parked = [spot.current_car for spot in model.spots if spot.current_car is not None]
+        assert model.parked_by_type[spot_type] == sum(car.car_type == spot_type for car in parked)
+        assert model.queued_by_type[spot_type] == sum(car.car_type == spot_type for car in model.queue)
+
+
+@pytest.mark.parametrize("backend", list(Backends))
+@pytest.mark.parametrize("mode", list(Modes))
+def test_counters_after_parking_leaving_and_retyping(make_simulation, mode, backend):
+    model = make_simulation(mode, backend=backend, seed=3).model
+    rng = random.Random(3)
+    for _ in range(600):
+        model.step()
+        # Retype a few spots of a random type, occupied ones included
+        if rng.random() < 0.2:
+            from_type, to_type = rng.sample(list(Type), 2)
+            model.convert_spots(from_type, to_type, rng.randint(1, 5), free_only=rng.random() < 0.5)
+        check_counters(model)
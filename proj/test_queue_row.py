@@ -0,0 +1,27 @@
+import pytest
+
+from simulation import Modes
+
+
+def check_queue_row(model):
+    visible = min(len(model.queue), model.width)
+    for x, car in enumerate(model.queue):
+        assert car.pos == ((x, 0) if x < visible else None)
+    for x in range(model.width):
+        assert model.grid.get_cell_list_contents([(x, 0)]) == ([model.queue[x]] if x < visible else [])
+
+
+@pytest.mark.parametrize("mode", list(Modes))
+def test_incremental_queue_row_matches_a_full_redraw(make_simulation, mode):
+    model = make_simulation(mode, seed=10, headless=False).model
+    update_queue = model.update_queue
+
+    def update_and_check():
+        update_queue()
+        check_queue_row(model)
+
+    model.update_queue = update_and_check
+    for _ in range(600):
+        model.step()
+    # The peak fills the queue past the row's width
+    assert len(model.queue) > model.width
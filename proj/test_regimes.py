@@ -0,0 +1,65 @@
+import pytest
+
+from regimes import (AllocationSchedule, OFF_PEAK_ALLOCATION, PEAK_ALLOCATION, Transition, peak_hours_schedule,
+                     weekly_schedule)
+
+DAY = 1440
+WEEKDAY = [Transition(0, "weekday night"), Transition(8 * 60, "weekday peak"), Transition(18 * 60, "weekday night")]
+WEEKEND = [Transition(0, "weekend"), Transition(20 * 60, "weekend evening")]
+
+
+def test_allocation_holds_until_the_next_transition():
+    schedule = peak_hours_schedule(8, 18)
+    assert schedule.allocation_at(0) == OFF_PEAK_ALLOCATION
+    assert schedule.allocation_at(8 * 60 - 1) == OFF_PEAK_ALLOCATION
+    assert schedule.allocation_at(8 * 60) == PEAK_ALLOCATION
+    assert schedule.allocation_at(18 * 60 - 1) == PEAK_ALLOCATION
+    assert schedule.allocation_at(18 * 60) == OFF_PEAK_ALLOCATION
+    # The schedule repeats every day
+    assert schedule.allocation_at(3 * DAY + 9 * 60) == PEAK_ALLOCATION
+
+
+def test_allocation_wraps_around_the_period():
+    schedule = AllocationSchedule([Transition(6 * 60, "day"), Transition(22 * 60, "night")])
+    assert schedule.allocation_at(0) == "night"
+    assert schedule.allocation_at(DAY + 5 * 60) == "night"
+    assert schedule.allocation_at(DAY + 6 * 60) == "day"
+
+
+def test_next_change():
+    schedule = peak_hours_schedule(8, 18)
+    assert schedule.next_change(0) == 8 * 60
+    assert schedule.next_change(8 * 60 - 1) == 8 * 60
+    assert schedule.next_change(8 * 60) == 18 * 60
+    assert schedule.next_change(18 * 60) == DAY
+    assert schedule.next_change(2 * DAY + 20 * 60) == 3 * DAY
+
+    # Every minute up to the next change has the same allocation
+    minute = 0
+    while minute < 3 * DAY:
+        change = schedule.next_change(minute)
+        assert change > minute
+        assert all(schedule.allocation_at(between) == schedule.allocation_at(minute)
+                   for between in range(minute, change, 7))
+        minute = change
+
+
+def test_weekly_schedule():
+    schedule = weekly_schedule(WEEKDAY, WEEKEND)
+    assert schedule.allocation_at(9 * 60) == "weekday peak"
+    assert schedule.allocation_at(4 * DAY + 23 * 60) == "weekday night"
+    assert schedule.allocation_at(5 * DAY + 9 * 60) == "weekend"
+    assert schedule.allocation_at(6 * DAY + 21 * 60) == "weekend evening"
+    # The next week starts on a weekday again
+    assert schedule.allocation_at(7 * DAY + 9 * 60) == "weekday peak"
+
+    assert schedule.next_change(4 * DAY + 18 * 60) == 5 * DAY
+    assert schedule.next_change(5 * DAY) == 5 * DAY + 20 * 60
+    assert schedule.next_change(6 * DAY + 20 * 60) == 7 * DAY
+
+
+def test_transitions_must_be_within_the_period():
+    with pytest.raises(ValueError):
+        AllocationSchedule([])
+    with pytest.raises(ValueError):
+        AllocationSchedule([Transition(DAY, PEAK_ALLOCATION)])
@@ -0,0 +1,42 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from replication import RunningStats, t_quantile
+
+
+@pytest.mark.parametrize("probability, degrees_of_freedom, expected", [
+    (0.975, 1, 12.706),
+    (0.975, 2, 4.303),
+    (0.975, 5, 2.571),
+    (0.975, 10, 2.228),
+    (0.975, 30, 2.042),
+    (0.95, 4, 2.132),
+    (0.995, 3, 5.841),
+])
+def test_t_quantile_matches_the_table(probability, degrees_of_freedom, expected):
+    assert t_quantile(probability, degrees_of_freedom) == pytest.approx(expected, abs=5e-4)
+    assert t_quantile(1 - probability, degrees_of_freedom) == pytest.approx(-expected, abs=5e-4)
+
+
+def test_running_stats_match_the_sample_statistics():
+    rng = random.Random(8)
+    values = [rng.gauss(100, 15) for _ in range(500)]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(statistics.fmean(values))
+    assert stats.variance() == pytest.approx(statistics.variance(values))
+    expected = t_quantile(0.975, len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+    assert stats.half_width(0.95) == pytest.approx(expected)
+
+
+def test_half_width_needs_two_values():
+    stats = RunningStats()
+    stats.add(1.0)
+    assert stats.variance() == 0.0
+    assert stats.half_width() == math.inf
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from metrics import COLUMNS
+from report import decimate, run_series
+
+
+def test_short_series_are_kept_as_they_are():
+    x = np.arange(100)
+    y = np.sin(x)
+    decimated_x, decimated_y = decimate(x, y, columns=50)
+    assert list(decimated_x) == list(x)
+    assert list(decimated_y) == list(y)
+
+
+def test_decimate_keeps_each_slices_extremes_in_order():
+    rng = np.random.default_rng(25)
+    x = np.arange(10007) / 60
+    y = rng.normal(size=len(x))
+    y[1234], y[8000] = 50, -50
+
+    decimated_x, decimated_y = decimate(x, y, columns=100)
+    assert len(decimated_x) <= 200
+    assert (np.diff(decimated_x) > 0).all()
+    assert decimated_y.max() == 50 and decimated_y.min() == -50
+
+    # Every kept point is a point of the series
+    index = np.searchsorted(x, decimated_x)
+    assert (x[index] == decimated_x).all() and (y[index] == decimated_y).all()
+
+    size = -(-len(y) // 100)
+    for start in range(0, len(y), size):
+        kept = decimated_y[(decimated_x >= x[start]) & (decimated_x <= x[min(start + size, len(x)) - 1])]
+        assert kept.min() == y[start:start + size].min()
+        assert kept.max() == y[start:start + size].max()
+
+
+def test_decimate_ignores_leading_nans():
+    # Slices of 50 points: the first one still has values after the rolling median's NaNs
+    y = pd.Series(np.arange(5000, dtype=float)).rolling(window=20).median()
+    decimated_x, decimated_y = decimate(np.arange(5000), y, columns=100)
+    assert decimated_x[0] == 19 and not np.isnan(decimated_y).any()
+    assert decimated_y[-1] == y.iloc[-1]
+
+    # A slice of only NaNs keeps one, so the line has a gap there
+    y = pd.Series(np.arange(5000, dtype=float)).rolling(window=120).median()
+    decimated_x, decimated_y = decimate(np.arange(5000), y, columns=100)
+    assert list(decimated_x[:3]) == [0, 50, 119]
+    assert np.isnan(decimated_y[:2]).all() and not np.isnan(decimated_y[2:]).any()
+
+
+def test_run_series_skips_the_first_hour():
+    df = pd.DataFrame({column: np.arange(1, 3001) for column in COLUMNS})
+    series = run_series(df, columns=100)
+    x, _ = series["earnings"]
+    assert x[0] == 1 and x[-1] == 50
+    assert series["final_earnings"] == df["earnings"].iloc[-1]
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from metrics import COLUMNS
+from simulation import Modes
+from sinks import BinarySink, CsvSink, ParquetSink
+
+
+def binary_sink(tmp_path):
+    return BinarySink(str(tmp_path / "metrics"))
+
+
+def csv_sink(tmp_path):
+    return CsvSink(str(tmp_path / "metrics.csv"))
+
+
+def parquet_sink(tmp_path):
+    pytest.importorskip("pyarrow")
+    return ParquetSink(str(tmp_path / "metrics.parquet"))
+
+
+# Two full chunks of 1440 rows and a partial one
+@pytest.mark.parametrize("make_sink", [binary_sink, csv_sink, parquet_sink])
+def test_sink_round_trip_matches_in_memory_metrics(make_simulation, run_for, tmp_path, make_sink):
+    in_memory_df, _ = run_for(make_simulation(Modes.PRIORITY, seed=11), 3000)
+    reader, _ = run_for(make_simulation(Modes.PRIORITY, seed=11, metrics_sink=make_sink(tmp_path)), 3000)
+
+    assert len(reader) == 3000
+    assert list(reader["earnings"]) == list(in_memory_df["earnings"])
+    pd.testing.assert_frame_equal(reader.to_dataframe()[COLUMNS], in_memory_df[COLUMNS], check_dtype=False)
+
+    chunks = list(reader.iter_chunks())
+    assert [len(chunk) for chunk in chunks] == [1440, 1440, 120]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True)[COLUMNS], in_memory_df[COLUMNS],
+                                  check_dtype=False)
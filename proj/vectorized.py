@@ -0,0 +1,64 @@
+import numpy as np
+
+from agent import Type, leave_probabilities
+
+# Index of each car type in the type array
+CAR_TYPES = list(Type)
+TYPE_INDEX = {car_type: index for index, car_type in enumerate(CAR_TYPES)}
+
+
+class ParkedCars:
+    """
+    Parked cars stored as parallel NumPy arrays (struct of arrays), so that every car's
+    departure decision for a minute is a single batched array operation.
+
+    Only the first `size` entries are in use; departed cars are compacted away.
+    """
+
+    def __init__(self, capacity, rng):
+        self.rng = rng
+        self.size = 0
+        self.car_type = np.zeros(capacity, dtype=np.int8)
+        self.parked_minute = np.zeros(capacity, dtype=np.int64)
+        self.created_minute = np.zeros(capacity, dtype=np.int64)
+        self.spot_index = np.zeros(capacity, dtype=np.int64)
+        # Parking time sampled at arrival, or -1 when departures are drawn minute by minute
+        self.dwell = np.full(capacity, -1, dtype=np.int64)
+        # Car objects are kept alongside for the departed-car statistics
+        self.cars = np.empty(capacity, dtype=object)
+
+    def add(self, car, spot_index, parked_minute):
+        i = self.size
+        self.car_type[i] = TYPE_INDEX[car.car_type]
+        self.parked_minute[i] = parked_minute
+        self.created_minute[i] = car.created_minute
+        self.spot_index[i] = spot_index
+        self.dwell[i] = -1 if car.dwell is None else car.dwell
+        self.cars[i] = car
+        self.size += 1
+
+    def draw_departures(self, current_minute, min=25, med=50, max=75):
+        """
+        Decide which cars leave at current_minute with one uniform draw per parked car.
+        The leaving cars are removed from the arrays and returned.
+        """
+        n = self.size
+        if n == 0:
+            return []
+
+        time_parked = current_minute - self.parked_minute[:n]
+        leaving = self.rng.random(n) < leave_probabilities(time_parked, min, med, max)
+        dwell = self.dwell[:n]
+        leaving = np.where(dwell >= 0, time_parked >= dwell, leaving)
+        if not leaving.any():
+            return []
+
+        departed = list(self.cars[:n][leaving])
+        staying = ~leaving
+        kept = int(staying.sum())
+        for array in (self.car_type, self.parked_minute, self.created_minute, self.spot_index, self.dwell,
+                      self.cars):
+            array[:kept] = array[:n][staying]
+        self.cars[kept:n] = None
+        self.size = kept
+        return departed